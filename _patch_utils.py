@@ -0,0 +1,74 @@
+"""
+_patch_utils.py — shared helpers for the patch_* scripts
+- locate a line by a literal or compiled anchor and capture its leading indent
+- splice a replacement into a source string
+- emit the cached config-hash helper that run_weekly_predictions() calls
+"""
+import re
+
+# Leading indentation of a line (spaces/tabs only)
+_INDENT_LITERAL = re.compile(r'[ \t]*')
+
+
+def line_indent(src: str, pos: int) -> str:
+    """Indent of the line containing offset `pos`."""
+    line_start = src.rfind("\n", 0, pos) + 1
+    return _INDENT_LITERAL.match(src, line_start).group(0)
+
+
+def locate_line(src: str, literal: str, start: int = 0):
+    """
+    Find the first occurrence of `literal` that only has indentation before it on its line.
+    Returns (line_start, idx, indent), or None if there is no such occurrence.
+    """
+    idx = src.find(literal, start)
+    while idx != -1:
+        line_start = src.rfind("\n", 0, idx) + 1
+        indent = src[line_start:idx]
+        if _INDENT_LITERAL.fullmatch(indent):
+            return line_start, idx, indent
+        idx = src.find(literal, idx + 1)
+    return None
+
+
+def find_indent(src: str, anchor_re: re.Pattern, pos: int = 0):
+    """
+    Search `anchor_re` from `pos`; returns (match, indent of the matched line),
+    or (None, "") when the anchor is missing.
+    """
+    m = anchor_re.search(src, pos)
+    if not m:
+        return None, ""
+    return m, line_indent(src, m.start())
+
+
+def splice(src: str, start: int, end: int, replacement: str) -> str:
+    """Return `src` with src[start:end] replaced by `replacement`."""
+    return src[:start] + replacement + src[end:]
+
+
+# Module-level helper emitted into run_predictions.py; the function body calls it as
+#   st = os.stat(CONFIG_PATH)
+#   config_hash = _config_hash(str(CONFIG_PATH), st.st_mtime_ns, st.st_size)
+CONFIG_HASH_HELPER = (
+    "@lru_cache(maxsize=8)\n"
+    "def _config_hash(path_str: str, mtime_ns: int, size: int) -> str:\n"
+    "    # Keyed on (path, mtime_ns, size): any edit to the config busts the cache and rehashes\n"
+    "    return hashlib.sha256(Path(path_str).read_bytes()).hexdigest()\n"
+)
+_PAT_RUNFUNC_DEF = re.compile(r'(?m)^def\s+run_weekly_predictions\s*\(')
+_PAT_PATHLIB_IMPORT = re.compile(r'(?m)^from\s+pathlib\s+import\s+Path[ \t]*\n')
+
+
+def ensure_config_hash_helper(src: str) -> str:
+    """Add `_config_hash` (and its lru_cache import) above run_weekly_predictions() if missing."""
+    if "def _config_hash(" not in src:
+        m = _PAT_RUNFUNC_DEF.search(src)
+        if m:
+            src = splice(src, m.start(), m.start(), CONFIG_HASH_HELPER + "\n")
+    if "from functools import lru_cache" not in src:
+        # next to the pathlib import, else directly above the helper
+        m = _PAT_PATHLIB_IMPORT.search(src) or re.search(r'(?m)^@lru_cache\(maxsize=8\)\ndef _config_hash\(', src)
+        if m:
+            src = splice(src, m.start(), m.start(), "from functools import lru_cache\n")
+    return src
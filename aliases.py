@@ -28,7 +28,9 @@ def apply_aliases(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
     out = df.copy()
     for c in cols:
         if c in out.columns:
-            out[c] = out[c].astype(str).map(_normalize_code)
+            # Resolve each distinct raw code once, then broadcast with a dict lookup
+            raw = out[c].astype(str)
+            out[c] = raw.map({code: _normalize_code(code) for code in raw.unique()})
     return out
 
 __all__ = ["apply_aliases"]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+apply_all_patches.py — run the run_predictions.py patch_* transforms in one pass
+- Reads run_predictions.py once, chains each patch's apply(src) in memory, writes once
+- Refuses to write if the result no longer parses (fail loudly, keep the old file)
+- Writes via a temp file + os.replace, so the target is never left half-written
+
+The default is a single render of the canonical run_weekly_predictions() template
+(patch_rebuild_runfunc._BODY_TMPL); the checked-in run_predictions.py is exactly that
+render. The incremental patch_* scripts are only needed to repair older copies.
+
+Usage:
+  python3 apply_all_patches.py                       # canonical rebuild only
+  python3 apply_all_patches.py patch_step1_wire_validators patch_run_preds_manifest_extras ...
+"""
+import ast, importlib, os, pathlib, sys
+
+FN = "run_predictions.py"
+
+# patch_rebuild_runfunc already emits the validators, STEP 5 fallback and manifest
+# extras, so on its own it reproduces what the step1/step5/extras patches add.
+DEFAULT_PATCHES = ["patch_rebuild_runfunc"]
+
+
+def main(names):
+    p = pathlib.Path(FN)
+    src = orig = p.read_bytes().decode("utf-8")
+
+    for name in names:
+        mod = importlib.import_module(name.removesuffix(".py"))
+        src = mod.apply(src)
+        print(f"  · {name}")
+
+    try:
+        ast.parse(src, filename=FN)
+    except SyntaxError as e:
+        sys.exit(f"❌ Patched {FN} does not parse ({e}); left unchanged.")
+
+    if src == orig:
+        print(f"✅ {FN} already up to date.")
+        return
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_bytes(src.encode("utf-8"))
+    os.replace(tmp, p)
+    print(f"✅ Applied {len(names)} patch(es) to {FN} in one write.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or DEFAULT_PATCHES)
@@ -208,7 +208,7 @@ while i < n:
         i += 1
 
 # ---------- write ----------
-import csv
+import pandas as pd
 if not games:
     print("⛔ No games parsed. Double-check the input text formatting.")
     # small debug aid: show first few content lines
@@ -216,14 +216,13 @@ if not games:
         print(f"  · {ln}")
     sys.exit(1)
 
+FIELDNAMES = ["date","home_team","away_team","home_score","away_score","neutral_site","spread_home","total"]
+df = pd.DataFrame(games, columns=FIELDNAMES)
 # sort by date (stable within date)
-games.sort(key=lambda r: r["date"])
-with OUT.open("w", newline="", encoding="utf-8") as f:
-    w = csv.DictWriter(f, fieldnames=["date","home_team","away_team","home_score","away_score","neutral_site","spread_home","total"])
-    w.writeheader()
-    w.writerows(games)
+df = df.sort_values("date", kind="mergesort")
+df.to_csv(OUT, index=False, encoding="utf-8")
 
 print(f"✅ Wrote {OUT} with {len(games)} games. (Skipped {errors} stray rows.)")
 # show a couple examples
-for r in games[:4]:
+for r in df.head(4).to_dict("records"):
     print("   ", r)
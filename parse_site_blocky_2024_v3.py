@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-import re, csv, pathlib
+import re, csv, pathlib, functools
 from datetime import datetime
 
 SRC = pathlib.Path("sources/2024_results_by_week.txt")
@@ -31,8 +31,10 @@ def parse_num_after_letter(s: str) -> float:
         raise ValueError(f"No number in: {s!r}")
     return float(m.group(0))
 
+@functools.lru_cache(maxsize=4096)
 def is_team_line(s: str) -> bool:
     # crude but effective for this blocky paste
+    # (memoized: team/day/flag lines recur all season and the retry loops re-test them)
     if not s: return False
     if s in DAYS or s in LOCFLAGS: return False
     if re.fullmatch(r"[OUWP]\b.*", s): return False   # lines starting with O/U/W/L/P (not teams)
@@ -105,11 +107,13 @@ def main():
         # Favorite team
         if i >= n: break
         fav = next_line()
-        while fav in DAYS or fav in LOCFLAGS or not is_team_line(fav):
-            if i >= n: break
-            fav = next_line()
+        # bounded recovery (like spread/total below) so a malformed block can't eat the file
+        tries = 0
+        while (fav in DAYS or fav in LOCFLAGS or not is_team_line(fav)) and tries < 5 and i < n:
+            fav = next_line(); tries += 1
         if not is_team_line(fav):
-            # malformed block, skip ahead
+            # malformed block: rewind so the outer loop resyncs on the next Day line
+            i -= tries
             continue
         fav = fav.upper()
 
@@ -140,10 +144,11 @@ def main():
         # Optional empty spacer lines might appear here — now Underdog team
         if i >= n: break
         under = next_line()
-        while not is_team_line(under):
-            if i >= n: break
-            under = next_line()
+        tries = 0
+        while not is_team_line(under) and tries < 5 and i < n:
+            under = next_line(); tries += 1
         if not is_team_line(under):
+            i -= tries
             continue
         under = under.upper()
 
@@ -1,22 +1,13 @@
 import re, sys, pathlib
 
-p = pathlib.Path("run_predictions.py")
-s = p.read_text(encoding="utf-8")
-
-# 1) Ensure import line exists
-if "from injuries_fallbacks import derive_injuries_from_rosters" not in s:
-    s = s.replace(
-        "from run_monte_carlo import run_simulation",
-        "from run_monte_carlo import run_simulation\nfrom injuries_fallbacks import derive_injuries_from_rosters"
-    )
-
-# 2) Replace STEP 5 block
-pattern = re.compile(
-    r'print\([^\n]*STEP\s*5[^\n]*\)\s*.*?(?=print\([^\n]*STEP\s*6)',
-    re.DOTALL
+# STEP 5 print line, then whole lines up to (not including) the STEP 6 print call.
+_PAT_STEP5_BLOCK = re.compile(
+    r'print\([^\n]*STEP\s*5[^\n]*\)[^\n]*\n'
+    r'(?:(?![ \t]*print\([^\n]*STEP\s*6)[^\n]*\n)*'
+    r'[ \t]*(?=print\([^\n]*STEP\s*6)'
 )
 
-replacement = """print("\\nSTEP 5: Fetching latest injury data (strict)...")
+STEP5_REPLACEMENT = """print("\\nSTEP 5: Fetching latest injury data (strict)...")
 injuries = fetch_injured_players()
 inj_ct = len(injuries) if isinstance(injuries, pd.DataFrame) else 0
 
@@ -25,16 +16,33 @@ if inj_ct == 0:
     teams_in_play = _pick_teams_from_odds(odds_df)
     injuries = derive_injuries_from_rosters(teams_in_play)
     inj_ct = len(injuries)
-    teams_ct = injuries["team_code"].nunique() if inj_ct else 0
+    teams_ct = len(set(injuries["team_code"].to_numpy())) if inj_ct else 0
     print(f"Roster-derived injuries: {inj_ct} rows across {teams_ct} teams.")
 
 print(f"Found {inj_ct} records from injuries (live or fallback).")
 """
 
-s2, n = pattern.subn(replacement, s)
-if n == 0:
-    print("Could not find STEP 5 block to replace.")
-    sys.exit(1)
+p = pathlib.Path("run_predictions.py")
+
+
+def apply(s: str) -> str:
+    # 1) Ensure import line exists
+    if "from injuries_fallbacks import derive_injuries_from_rosters" not in s:
+        s = s.replace(
+            "from run_monte_carlo import run_simulation",
+            "from run_monte_carlo import run_simulation\nfrom injuries_fallbacks import derive_injuries_from_rosters"
+        )
+
+    # 2) Replace STEP 5 block
+    s2, n = _PAT_STEP5_BLOCK.subn(STEP5_REPLACEMENT, s)
+    if n == 0:
+        print("Could not find STEP 5 block to replace.")
+        sys.exit(1)
+
+    return s2
+
 
-p.write_text(s2, encoding="utf-8")
-print("✅ STEP 5 block replaced and import ensured.")
+if __name__ == "__main__":
+    s = p.read_bytes().decode("utf-8")
+    p.write_bytes(apply(s).encode("utf-8"))
+    print("✅ STEP 5 block replaced and import ensured.")
@@ -1,56 +1,78 @@
 import pathlib, re, sys, json
 
-fn = pathlib.Path("manifest_writer.py")
-src = fn.read_text(encoding="utf-8")
-
-# Ensure write_manifest signature has extras: dict | None
-src2 = src
-
-# 1) Add 'extras' parameter to write_manifest signature if missing
-src2 = re.sub(
-    r'def\s+write_manifest\(\s*([^)]+)\):',
-    lambda m: (
-        "def write_manifest(" +
-        m.group(1).rstrip() +
-        (", extras: dict | None = None" if "extras" not in m.group(1) else "") +
-        "):"
-    ),
-    src2, count=1
+_PAT_DEF_WRITE = re.compile(r'def\s+write_manifest\(\s*([^)]+)\):')
+_PAT_WITH_OPEN = re.compile(r'(?m)^\s*with\s+open\([^\n]+\)\s+as\s+f:\s*$')
+_PAT_MANIFEST_DICT = re.compile(r'(?m)^\s*manifest\s*=\s*{')
+_PAT_DICT_CLOSE = re.compile(r'\n\s*}\s*\n')
+
+# Marker this patch emits; when present the extras merge is already in place
+_APPLIED_SENTINELS = (
+    "manifest['extras'] = extras",
 )
 
-# 2) Ensure extras merged into manifest body at the root under 'extras'
-# naive insertion: after top-level dict creation
-if "extras" not in src2 or "manifest[\"extras\"]" not in src2:
-    # Try to inject right before the JSON dump/write section
-    insert_after = re.search(r'(?m)^\s*with\s+open\([^\n]+\)\s+as\s+f:\s*$', src2)
-    if insert_after:
-        i = insert_after.start()
-        before = src2[:i]
-        after = src2[i:]
-        inject = (
-            "    # Attach optional extras\n"
-            "    try:\n"
-            "        if extras:\n"
-            "            manifest = locals().get('manifest', None)\n"
-            "            if manifest is None:\n"
-            "                pass\n"
-            "    except Exception:\n"
-            "        pass\n"
-        )
-        # But better: look for where the manifest dict is built
-    # More robust: find first creation of a 'manifest' dict
-    m_dict = re.search(r'(?m)^\s*manifest\s*=\s*{', src2)
-    if m_dict:
-        # find the end of that dict (next line that closes with })
-        close = re.search(r'\n\s*}\s*\n', src2[m_dict.end():])
-        if close:
-            endpos = m_dict.end() + close.end()
-            src2 = src2[:endpos] + (
-                "\n    # Merge extras into manifest if provided\n"
-                "    if extras:\n"
-                "        manifest['extras'] = extras\n"
-            ) + src2[endpos:]
-
-# 3) If no 'manifest' variable exists (unlikely), leave file untouched
-fn.write_text(src2, encoding="utf-8")
-print("Patched manifest_writer.py to accept and include 'extras'.")
+fn = pathlib.Path("manifest_writer.py")
+
+
+def apply(src: str) -> str:
+    if all(token in src for token in _APPLIED_SENTINELS):
+        return src
+
+    # Ensure write_manifest signature has extras: dict | None
+    src2 = src
+
+    # 1) Add 'extras' parameter to write_manifest signature if missing
+    src2 = _PAT_DEF_WRITE.sub(
+        lambda m: (
+            "def write_manifest(" +
+            m.group(1).rstrip() +
+            (", extras: dict | None = None" if "extras" not in m.group(1) else "") +
+            "):"
+        ),
+        src2, count=1
+    )
+
+    # 2) Ensure extras merged into manifest body at the root under 'extras'
+    # naive insertion: after top-level dict creation
+    if "extras" not in src2 or "manifest[\"extras\"]" not in src2:
+        # Try to inject right before the JSON dump/write section
+        insert_after = _PAT_WITH_OPEN.search(src2)
+        if insert_after:
+            i = insert_after.start()
+            before = src2[:i]
+            after = src2[i:]
+            inject = (
+                "    # Attach optional extras\n"
+                "    try:\n"
+                "        if extras:\n"
+                "            manifest = locals().get('manifest', None)\n"
+                "            if manifest is None:\n"
+                "                pass\n"
+                "    except Exception:\n"
+                "        pass\n"
+            )
+            # But better: look for where the manifest dict is built
+        # More robust: find first creation of a 'manifest' dict
+        m_dict = _PAT_MANIFEST_DICT.search(src2)
+        if m_dict:
+            # find the end of that dict (next line that closes with })
+            close = _PAT_DICT_CLOSE.search(src2[m_dict.end():])
+            if close:
+                endpos = m_dict.end() + close.end()
+                src2 = src2[:endpos] + (
+                    "\n    # Merge extras into manifest if provided\n"
+                    "    if extras:\n"
+                    "        manifest['extras'] = extras\n"
+                ) + src2[endpos:]
+
+    # 3) If no 'manifest' variable exists (unlikely), leave file untouched
+    return src2
+
+
+if __name__ == "__main__":
+    src = fn.read_bytes().decode("utf-8")
+    new_src = apply(src)
+    if new_src == src:
+        print("✅ Patch already applied (manifest_writer.py already accepts extras); nothing to do.")
+        sys.exit(0)
+    fn.write_bytes(new_src.encode("utf-8"))
+    print("Patched manifest_writer.py to accept and include 'extras'.")
@@ -1,85 +1,164 @@
-import hashlib, json, pathlib, re, sys
+import ast, pathlib, sys
 
-fn = pathlib.Path("run_predictions.py")
-src = fn.read_text(encoding="utf-8")
-
-# Ensure we import hashlib at top
-if "import hashlib" not in src:
-    src = src.replace("import os, sys, json, time, socket, platform",
-                      "import os, sys, json, time, socket, platform, hashlib")
-
-# 1) Track injury source around STEP 5. We look for our STEP 5 block and add tracking vars.
-# Add defaults near the start of run_weekly_predictions function body (after the "cfg = _load_json" line)
-src = re.sub(
-    r'(cfg\s*=\s*_load_json\(CONFIG_PATH\)\n\s*require_env\(os\.environ,\s*REQUIRED_ENV\)\n)',
-    r'\1' +
-    "    injury_source = 'live'\n"
-    "    injuries_live_count = 0\n"
-    "    injuries_fallback_count = 0\n",
-    src, count=1
-)
+from _patch_utils import ensure_config_hash_helper
 
-# After initial injuries fetch, set live count; if fallback path executes, flip source and set counts
-# Find the line 'injuries = fetch_injured_players()' inside STEP 5 block
-src = re.sub(
-    r'(\n\s*injuries\s*=\s*fetch_injured_players\(\)\n\s*inj_ct\s*=\s*len\(injuries\)[^\n]*\n)',
-    r'\1' +
-    "    injuries_live_count = inj_ct\n",
-    src, count=1
+# Markers this patch emits; when all are present there is nothing left to add
+_APPLIED_SENTINELS = (
+    "write_manifest(OUT_MANIFEST, run_meta, inputs, outputs, audits, extras)",
+    "injury_source",
+    "config_hash =",
+    "sigma_policy_name",
 )
 
-# In the fallback block (if inj_ct == 0), set injury_source and fallback count
-src = re.sub(
-    r'(\n\s*if\s+inj_ct\s*==\s*0:\n(?:.|\n)*?inj_ct\s*=\s*len\(injuries\)\n)',
-    r"\1" +
-    "    injury_source = 'fallback'\n"
-    "    injuries_fallback_count = inj_ct\n",
-    src, count=1
-)
+IMPORT_LINE = "import os, sys, json, time, socket, platform"
+MANIFEST_CALL = "write_manifest(OUT_MANIFEST, run_meta, inputs, outputs, audits)"
+MANIFEST_CALL_EXTRAS = "write_manifest(OUT_MANIFEST, run_meta, inputs, outputs, audits, extras)"
+
+fn = pathlib.Path("run_predictions.py")
+
+
+def _stmt_lists(tree: ast.AST):
+    """Yield every statement list (bodies, else/finally branches, handlers) in the tree."""
+    for node in ast.walk(tree):
+        for field in ("body", "orelse", "finalbody"):
+            stmts = getattr(node, field, None)
+            if isinstance(stmts, list) and stmts and isinstance(stmts[0], ast.stmt):
+                yield stmts
+
+
+def _block(indent: str, *lines: str) -> str:
+    return "".join(f"{indent}{ln}\n" if ln else "\n" for ln in lines)
+
+
+def apply(src: str) -> str:
+    if all(token in src for token in _APPLIED_SENTINELS):
+        return src
+
+    # What is already in place decides which edits are still needed (keeps the patch idempotent)
+    need_hashlib_import = "import hashlib" not in src
+    need_config_hash = "config_hash =" not in src
+    need_sigma = "sigma_policy_name" not in src
+    need_extras_block = "extras = {" not in src
+
+    try:
+        tree = ast.parse(src, filename=str(fn))
+    except SyntaxError as e:
+        sys.exit(f"❌ {fn} does not parse ({e}); fix it before patching.")
+
+    func = next((n for n in ast.walk(tree)
+                 if isinstance(n, ast.FunctionDef) and n.name == "run_weekly_predictions"), None)
+    if func is None:
+        sys.exit("❌ Could not find `def run_weekly_predictions()`.")
+
+    # Statements are located on the parse tree; their line spans and col_offset drive the
+    # text edits, so comments/formatting survive and every insert gets the statement's indent.
+    #   inserts:  line index -> text placed above that line
+    #   replaces: line index -> replacement line
+    lines = src.splitlines(keepends=True)
+    inserts, replaces = {}, {}
+
+    def add_before(lineno: int, text: str):
+        inserts[lineno - 1] = inserts.get(lineno - 1, "") + text
+
+    def add_after(stmt: ast.stmt, text: str):
+        inserts[stmt.end_lineno] = text + inserts.get(stmt.end_lineno, "")
+
+    def seg(stmt: ast.stmt) -> str:
+        return ast.get_source_segment(src, stmt) or ""
+
+    # Each edit fires at most once, at the first match in source order:
+    #   1) config hash right after `cfg = _load_json(CONFIG_PATH)`
+    #   2) tracking vars after the `require_env(...)` that directly follows it
+    #   3) `injuries_live_count` after the live fetch's `inj_ct = len(injuries...)`
+    #   4) `injury_source = 'fallback'` after the fallback's `inj_ct = len(injuries)`
+    #   5) `sigma_policy_name` before the STEP 6 print
+    #   6) `extras` dict before `write_manifest(...)`, which then gets the extra argument
+    done_tracking = done_hash = done_live = done_fallback = done_sigma = done_extras = False
+    for stmts in sorted(_stmt_lists(func), key=lambda b: b[0].lineno):
+        for k, stmt in enumerate(stmts):
+            code = seg(stmt)
+            ind = " " * stmt.col_offset
+
+            if code == "cfg = _load_json(CONFIG_PATH)":
+                if need_config_hash and not done_hash:
+                    add_after(stmt, _block(
+                        ind,
+                        "try:",
+                        "    st = os.stat(CONFIG_PATH)",
+                        "    config_hash = _config_hash(str(CONFIG_PATH), st.st_mtime_ns, st.st_size)",
+                        "except Exception:",
+                        "    config_hash = None",
+                    ))
+                    done_hash = True
+                if not done_tracking and k + 1 < len(stmts) \
+                        and seg(stmts[k + 1]) == "require_env(os.environ, REQUIRED_ENV)":
+                    add_after(stmts[k + 1], _block(
+                        ind,
+                        "injury_source = 'live'",
+                        "injuries_live_count = 0",
+                        "injuries_fallback_count = 0",
+                    ))
+                    done_tracking = True
+
+            elif not done_live and code.startswith("inj_ct = len(injuries)") \
+                    and k and seg(stmts[k - 1]) == "injuries = fetch_injured_players()":
+                add_after(stmt, _block(ind, "injuries_live_count = inj_ct"))
+                done_live = True
+
+            elif not done_fallback and isinstance(stmt, ast.If) and ast.unparse(stmt.test) == "inj_ct == 0":
+                hit = next((s for s in stmt.body if seg(s) == "inj_ct = len(injuries)"), None)
+                if hit:
+                    add_after(hit, _block(
+                        " " * hit.col_offset,
+                        "injury_source = 'fallback'",
+                        "injuries_fallback_count = inj_ct",
+                    ))
+                    done_fallback = True
+
+            elif need_sigma and not done_sigma and code.startswith('print("\\nSTEP 6: Monte Carlo simulations'):
+                add_before(stmt.lineno, _block(ind, 'sigma_policy_name = "constant"'))
+                done_sigma = True
+
+            elif not done_extras and code == MANIFEST_CALL:
+                if need_extras_block:
+                    # goes above any blank lines preceding the call
+                    at = stmt.lineno
+                    while at > 1 and not lines[at - 2].strip():
+                        at -= 1
+                    add_before(at, _block(
+                        ind,
+                        "extras = {",
+                        "    'injury_source': injury_source,",
+                        "    'injuries_live_count': injuries_live_count,",
+                        "    'injuries_fallback_count': injuries_fallback_count,",
+                        "    'sigma_policy': sigma_policy_name,",
+                        "    'config_hash': config_hash",
+                        "}",
+                    ))
+                replaces[stmt.lineno - 1] = lines[stmt.lineno - 1].replace(MANIFEST_CALL, MANIFEST_CALL_EXTRAS)
+                done_extras = True
+
+    out = []
+    for i, line in enumerate(lines):
+        out.append(inserts.get(i, ""))
+        line = replaces.get(i, line)
+        if need_hashlib_import and line.strip() == IMPORT_LINE:
+            line = line.replace(IMPORT_LINE, IMPORT_LINE + ", hashlib")
+            need_hashlib_import = False
+        out.append(line)
+    out.append(inserts.get(len(lines), ""))
+
+    src = "".join(out)
+    if need_config_hash:
+        src = ensure_config_hash_helper(src)
+    return src
+
 
-# 2) Compute config hash once (after cfg loaded). We'll add a helper right after cfg load.
-if "config_hash =" not in src:
-    src = re.sub(
-        r'(cfg\s*=\s*_load_json\(CONFIG_PATH\)\n)',
-        r"\1" +
-        "    try:\n"
-        "        config_hash = hashlib.sha256(Path(CONFIG_PATH).read_bytes()).hexdigest()\n"
-        "    except Exception:\n"
-        "        config_hash = None\n",
-        src, count=1
-    )
-
-# 3) Provide a sigma policy name (we'll wire real policy later). Default: constant.
-if "sigma_policy_name" not in src:
-    src = src.replace(
-        'print("\\nSTEP 6: Monte Carlo simulations...")',
-        'sigma_policy_name = "constant"\n'
-        '    print("\\nSTEP 6: Monte Carlo simulations...")'
-    )
-
-# 4) Extend write_manifest(...) call to pass extras
-# Find the write_manifest call and add a fourth param 'extras' or merge into dict before call
-# We will build an 'extras' dict right above the write_manifest call and pass it.
-m = re.search(r'(?m)^\s*write_manifest\(\s*OUT_MANIFEST,\s*run_meta,\s*inputs,\s*outputs,\s*audits\s*\)', src)
-if m:
-    # Build extras dict before the call
-    insert_pos = src.rfind('\n', 0, m.start())+1
-    extras_block = (
-        "    extras = {\n"
-        "        'injury_source': injury_source,\n"
-        "        'injuries_live_count': injuries_live_count,\n"
-        "        'injuries_fallback_count': injuries_fallback_count,\n"
-        "        'sigma_policy': sigma_policy_name,\n"
-        "        'config_hash': config_hash\n"
-        "    }\n"
-    )
-    if extras_block not in src:
-        src = src[:insert_pos] + extras_block + src[insert_pos:]
-    # Now modify the call to include extras if not already present at the end
-    src = src.replace(
-        "write_manifest(OUT_MANIFEST, run_meta, inputs, outputs, audits)",
-        "write_manifest(OUT_MANIFEST, run_meta, inputs, outputs, audits, extras)"
-    )
-
-fn.write_text(src, encoding="utf-8")
-print("Patched run_predictions.py: added extras (injury_source, counts, sigma_policy, config_hash) to manifest.")
+if __name__ == "__main__":
+    src = fn.read_bytes().decode("utf-8")
+    new_src = apply(src)
+    if new_src == src:
+        print("✅ Patch already applied (manifest extras already wired); nothing to do.")
+        sys.exit(0)
+    fn.write_bytes(new_src.encode("utf-8"))
+    print("Patched run_predictions.py: added extras (injury_source, counts, sigma_policy, config_hash) to manifest.")
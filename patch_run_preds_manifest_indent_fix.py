@@ -1,7 +1,13 @@
 import re, pathlib, sys
 
+from _patch_utils import locate_line, splice
+
+STEP6_PRINT = 'print("\\nSTEP 6: Monte Carlo simulations'
+MANIFEST_CALL = "write_manifest(OUT_MANIFEST"
+_SIGMA_ASSIGN_RE = re.compile(r'\bsigma_policy_name\s*=\s*["\']')
+_STRAY_SIGMA_RE = re.compile(r'(?m)^(?!!)(sigma_policy_name\s*=\s*["\'].*)$')
+
 p = pathlib.Path("run_predictions.py")
-src = p.read_text(encoding="utf-8")
 
 def ensure_sigma_before_step6(s: str) -> str:
     """
@@ -10,39 +16,40 @@ def ensure_sigma_before_step6(s: str) -> str:
     appears immediately before:
         <indent>print("\\nSTEP 6: Monte Carlo simulations...")
     """
-    step6_re = re.compile(r'(?m)^([ \t]*)print\("\\\\nSTEP 6: Monte Carlo simulations')
-    m = step6_re.search(s)
-    if not m:
+    hit = locate_line(s, STEP6_PRINT)
+    if not hit:
         return s
-    indent = m.group(1)
-    # Look at the previous non-empty line before the STEP 6 print
-    start = m.start()
-    prefix = s[:start]
-    # Find last newline before STEP6
-    last_nl = prefix.rfind("\n", 0, len(prefix)-1)
-    # Find second-to-last newline to isolate previous line
-    prev_nl = prefix.rfind("\n", 0, last_nl)
-    prev_line = prefix[prev_nl+1:last_nl] if last_nl != -1 else prefix
+    start, idx, indent = hit
+    # Isolate the line just before the STEP 6 print
+    prev_start = s.rfind("\n", 0, max(start - 1, 0)) + 1
+    prev_line = s[prev_start:max(start - 1, 0)]
     # If previous line already defines sigma_policy_name, do nothing
-    if re.search(r'\bsigma_policy_name\s*=\s*["\']', prev_line):
+    if _SIGMA_ASSIGN_RE.search(prev_line):
         return s
     # Insert our assignment with the same indent
     insertion = f'{indent}sigma_policy_name = "constant"\n'
-    return s[:start] + insertion + s[start:]
+    return splice(s, start, start, insertion)
 
 def ensure_extras_block_before_manifest(s: str) -> str:
     """
     Ensure an 'extras = {...}' dict appears right before the write_manifest(...) call,
     with proper indentation matching the call.
     """
-    call_re = re.compile(
-        r'(?m)^([ \t]*)write_manifest\(\s*OUT_MANIFEST\s*,\s*run_meta\s*,\s*inputs\s*,\s*outputs\s*,\s*audits(?:\s*,\s*extras)?\s*\)'
-    )
-    m = call_re.search(s)
-    if not m:
+    hit = locate_line(s, MANIFEST_CALL)
+    if not hit:
+        return s
+    call_start, idx, indent = hit
+    call_end = s.find(")", idx) + 1
+    call_text = s[idx:call_end]
+    args = "".join(call_text.split())
+    if args not in ("write_manifest(OUT_MANIFEST,run_meta,inputs,outputs,audits)",
+                    "write_manifest(OUT_MANIFEST,run_meta,inputs,outputs,audits,extras)"):
         return s
-    indent = m.group(1)
-    call_start = m.start()
+
+    # Ensure the call includes the extras argument
+    if not args.endswith(",extras)"):
+        call_text = call_text.rstrip().rstrip(")") + ", extras)"
+    s = splice(s, idx, call_end, call_text)
 
     # Build extras block with matching indent
     inner = indent + "    "
@@ -57,15 +64,10 @@ def ensure_extras_block_before_manifest(s: str) -> str:
     )
 
     # If an extras block already exists immediately above, skip insert
-    above = s[:call_start]
     # Look back a little window to avoid multiple inserts
     window_start = max(0, call_start - 600)
-    recent = above[window_start:call_start]
-    if "extras = {" not in recent:
-        s = s[:call_start] + extras_block + s[call_start:]
-
-    # Ensure the call includes the extras argument
-    s = s[:m.start()] + re.sub(r'\)\s*$', ', extras)', s[m.start():m.end()]) + s[m.end():]
+    if "extras = {" not in s[window_start:call_start]:
+        s = splice(s, call_start, call_start, extras_block)
     return s
 
 def dedupe_bad_sigma_insertions(s: str) -> str:
@@ -77,16 +79,20 @@ def dedupe_bad_sigma_insertions(s: str) -> str:
     This is conservative; we only remove lines that are *not* indented with spaces/tabs.
     """
     # Remove lines starting at column 0 that define sigma_policy_name
-    return re.sub(r'(?m)^(?!!)(sigma_policy_name\s*=\s*["\'].*)$', r'# \1  # removed stray global sigma line', s)
+    return _STRAY_SIGMA_RE.sub(r'# \1  # removed stray global sigma line', s)
+
+def apply(src: str) -> str:
+    # 1) Ensure sigma line has correct indent immediately before STEP 6 print
+    src = ensure_sigma_before_step6(src)
 
-# 1) Ensure sigma line has correct indent immediately before STEP 6 print
-src = ensure_sigma_before_step6(src)
+    # 2) Ensure extras dict is correctly indented and passed to write_manifest
+    src = ensure_extras_block_before_manifest(src)
 
-# 2) Ensure extras dict is correctly indented and passed to write_manifest
-src = ensure_extras_block_before_manifest(src)
+    # 3) Clean up any stray unindented sigma lines that might cause IndentationError elsewhere
+    return dedupe_bad_sigma_insertions(src)
 
-# 3) Clean up any stray unindented sigma lines that might cause IndentationError elsewhere
-src = dedupe_bad_sigma_insertions(src)
 
-p.write_text(src, encoding="utf-8")
-print("✅ Fixed indentation for sigma_policy and extras block.")
+if __name__ == "__main__":
+    src = p.read_bytes().decode("utf-8")
+    p.write_bytes(apply(src).encode("utf-8"))
+    print("✅ Fixed indentation for sigma_policy and extras block.")
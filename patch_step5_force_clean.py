@@ -1,59 +1,77 @@
 import re, sys, pathlib
 
+from _patch_utils import find_indent, splice
+
+_PAT_STEP4_DEPTH = re.compile(r'(?m)^[ \t]*depth_df\s*=\s*_load_depth_charts\(\s*DEPTH_PATH\s*\)\s*$')
+_PAT_STEP5_PRINT = re.compile(r'(?m)^[ \t]*print\([^\n]*STEP\s*5[^\n]*\)\s*$')
+_PAT_SIM_CALL = re.compile(r'(?m)^[ \t]*result\s*=\s*run_simulation\(')
+_PAT_ORPHAN_STEP6 = re.compile(r'(?m)^[ \t]*STEP\s*6:.*\)\s*$')
+_PAT_FOUND_INJ = re.compile(r'(?m)^[ \t]*print\(f"Found {inj_ct} records from injuries.*\)\s*$')
+
 FN = "run_predictions.py"
 p = pathlib.Path(FN)
-src = p.read_text(encoding="utf-8")
-
-# 1) Find the end of STEP 4 (depth_df assignment) and capture its indent
-m_after_step4 = re.search(r'(?m)^([ \t]*)depth_df\s*=\s*_load_depth_charts\(\s*DEPTH_PATH\s*\)\s*$', src)
-if not m_after_step4:
-    print("ERROR: couldn't find STEP 4 depth_df assignment line.")
-    sys.exit(2)
-indent = m_after_step4.group(1)
-start_idx = m_after_step4.end()
-
-# 2) Find the first STEP 5 marker after STEP 4
-m_step5 = re.search(r'(?m)^[ \t]*print\([^\n]*STEP\s*5[^\n]*\)\s*$', src[start_idx:])
-if not m_step5:
-    print("ERROR: couldn't find STEP 5 print line.")
-    sys.exit(2)
-step5_abs = start_idx + m_step5.start()
-
-# 3) Find the simulation call to cap our replacement region
-m_sim = re.search(r'(?m)^[ \t]*result\s*=\s*run_simulation\(', src[step5_abs:])
-if not m_sim:
-    print("ERROR: couldn't find 'result = run_simulation(' after STEP 5.")
-    sys.exit(2)
-sim_abs = step5_abs + m_sim.start()
-
-# 4) Build canonical STEP 5/6 block with the exact indent
-block = [
-    f'{indent}print("\\nSTEP 5: Fetching latest injury data (strict)...")',
-    f'{indent}injuries = fetch_injured_players()',
-    f'{indent}inj_ct = len(injuries) if isinstance(injuries, pd.DataFrame) else 0',
-    "",
-    f'{indent}if inj_ct == 0:',
-    f'{indent}    # Live injuries empty: derive conservative unavailability from roster statuses (IR/PUP/NFI/Suspended).',
-    f'{indent}    teams_in_play = _pick_teams_from_odds(odds_df)',
-    f'{indent}    injuries = derive_injuries_from_rosters(teams_in_play)',
-    f'{indent}    inj_ct = len(injuries)',
-    f'{indent}    teams_ct = injuries["team_code"].nunique() if inj_ct else 0',
-    f'{indent}    print(f"Roster-derived injuries: {{inj_ct}} rows across {{teams_ct}} teams.")',
-    "",
-    f'{indent}print(f"Found {{inj_ct}} records from injuries (live or fallback).")',
-    "",
-    f'{indent}print("\\nSTEP 6: Monte Carlo simulations...")',
-    ""
-]
-replacement = "\n".join(block)
-
-# 5) Splice: keep everything before STEP 5, insert our block, then keep the original simulation onward
-new_src = src[:step5_abs] + replacement + src[sim_abs:]
-# 6) Clean orphaned 'STEP 6' without print and duplicate injury lines at file scope
-new_src = re.sub(r'(?m)^[ \t]*STEP\s*6:.*\)\s*$', '', new_src)
-new_src = re.sub(r'(?m)^[ \t]*print\(f"Found {inj_ct} records from injuries.*\)\s*$',
-                 lambda m: m.group(0) if 'STEP 6' in new_src[new_src.find(m.group(0))-200:new_src.find(m.group(0))+200] else '',
-                 new_src)
-
-p.write_text(new_src, encoding="utf-8")
-print("✅ Rebuilt STEP 5/6 region and removed stray lines.")
+
+
+def apply(src: str) -> str:
+    # 1) Find the end of STEP 4 (depth_df assignment) and capture its indent
+    m_after_step4, indent = find_indent(src, _PAT_STEP4_DEPTH)
+    if not m_after_step4:
+        print("ERROR: couldn't find STEP 4 depth_df assignment line.")
+        sys.exit(2)
+    start_idx = m_after_step4.end()
+
+    # 2) Find the first STEP 5 marker after STEP 4
+    m_step5 = _PAT_STEP5_PRINT.search(src[start_idx:])
+    if not m_step5:
+        print("ERROR: couldn't find STEP 5 print line.")
+        sys.exit(2)
+    step5_abs = start_idx + m_step5.start()
+
+    # 3) Find the simulation call to cap our replacement region
+    m_sim = _PAT_SIM_CALL.search(src[step5_abs:])
+    if not m_sim:
+        print("ERROR: couldn't find 'result = run_simulation(' after STEP 5.")
+        sys.exit(2)
+    sim_abs = step5_abs + m_sim.start()
+
+    # 4) Build canonical STEP 5/6 block with the exact indent
+    block = [
+        f'{indent}print("\\nSTEP 5: Fetching latest injury data (strict)...")',
+        f'{indent}injuries = fetch_injured_players()',
+        f'{indent}inj_ct = len(injuries) if isinstance(injuries, pd.DataFrame) else 0',
+        "",
+        f'{indent}if inj_ct == 0:',
+        f'{indent}    # Live injuries empty: derive conservative unavailability from roster statuses (IR/PUP/NFI/Suspended).',
+        f'{indent}    teams_in_play = _pick_teams_from_odds(odds_df)',
+        f'{indent}    injuries = derive_injuries_from_rosters(teams_in_play)',
+        f'{indent}    inj_ct = len(injuries)',
+        f'{indent}    teams_ct = len(set(injuries["team_code"].to_numpy())) if inj_ct else 0',
+        f'{indent}    print(f"Roster-derived injuries: {{inj_ct}} rows across {{teams_ct}} teams.")',
+        "",
+        f'{indent}print(f"Found {{inj_ct}} records from injuries (live or fallback).")',
+        "",
+        f'{indent}print("\\nSTEP 6: Monte Carlo simulations...")',
+        ""
+    ]
+    replacement = "\n".join(block)
+
+    # 5) Splice: keep everything before STEP 5, insert our block, then keep the original simulation onward
+    new_src = splice(src, step5_abs, sim_abs, replacement)
+    # 6) Clean orphaned 'STEP 6' without print and duplicate injury lines at file scope
+    new_src = _PAT_ORPHAN_STEP6.sub('', new_src)
+    #    (one pass: each match's context window comes straight from m.start())
+    parts, last = [], 0
+    for m in _PAT_FOUND_INJ.finditer(new_src):
+        ctx = new_src[max(0, m.start() - 200):m.start() + 200]
+        parts.append(new_src[last:m.end() if 'STEP 6' in ctx else m.start()])
+        last = m.end()
+    parts.append(new_src[last:])
+    new_src = "".join(parts)
+
+    return new_src
+
+
+if __name__ == "__main__":
+    src = p.read_bytes().decode("utf-8")
+    p.write_bytes(apply(src).encode("utf-8"))
+    print("✅ Rebuilt STEP 5/6 region and removed stray lines.")
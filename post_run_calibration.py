@@ -17,9 +17,15 @@ Design:
 """
 
 from __future__ import annotations
+import io
 from pathlib import Path
 import pandas as pd
 
+def _kickoff_ns(s: pd.Series) -> pd.Series:
+    """Kickoff timestamps as int64 UTC nanoseconds (unparseable -> NaT sentinel)."""
+    ks = pd.DatetimeIndex(pd.to_datetime(s, utc=True, errors="coerce").astype("datetime64[ns, UTC]"))
+    return pd.Series(ks.asi8, index=s.index)
+
 def write_calibration(preds_df: pd.DataFrame,
                       cards_df: pd.DataFrame,
                       week_out: Path,
@@ -32,10 +38,25 @@ def write_calibration(preds_df: pd.DataFrame,
         if missing:
             raise RuntimeError(f"{name} missing columns: {missing}")
 
-    p = preds_df[keys + ["vegas_line","vegas_total","sigma","neutral_site"]].copy()
-    c = cards_df[keys + ["modeled_spread_home","modeled_total"]].copy()
+    # Plain projections: assign() below returns new frames, so no defensive .copy() is needed
+    p = preds_df[keys + ["vegas_line","vegas_total","sigma","neutral_site"]]
+    c = cards_df[keys + ["modeled_spread_home","modeled_total"]]
+
+    # Merge on compact keys: team codes as one shared categorical (int codes), kickoff as
+    # int64 UTC nanoseconds. preds_df keeps its original kickoff_utc text for the output.
+    teams = pd.CategoricalDtype(pd.unique(pd.concat(
+        [p["home_team"], p["away_team"], c["home_team"], c["away_team"]], ignore_index=True
+    ).astype(str)))
 
-    m = p.merge(c, on=keys, how="inner")
+    def _keyed(df: pd.DataFrame) -> pd.DataFrame:
+        return df.assign(home_team=df["home_team"].astype(str).astype(teams),
+                         away_team=df["away_team"].astype(str).astype(teams),
+                         _kickoff_ns=_kickoff_ns(df["kickoff_utc"]))
+    p = _keyed(p)
+    c = _keyed(c).drop(columns="kickoff_utc")
+
+    mkeys = ["home_team","away_team","_kickoff_ns"]
+    m = p.merge(c, on=mkeys, how="inner").drop(columns="_kickoff_ns")
 
     m["delta_spread"] = m["modeled_spread_home"] - m["vegas_line"]
     m["delta_total"]  = m["modeled_total"] - m["vegas_total"]
@@ -49,18 +70,32 @@ def write_calibration(preds_df: pd.DataFrame,
     ]
     m = m[out_cols].copy()
 
+    # Serialise once; the weekly file, a new season log and an append all reuse this text
+    buf = io.StringIO()
+    m.to_csv(buf, index=False)
+    csv_bytes = buf.getvalue().encode("utf-8")
+
     # Write weekly file (overwrite) and append to season log
-    m.to_csv(week_out, index=False)
+    week_out.write_bytes(csv_bytes)
 
-    # Append or create season log
+    # Append or create season log. Only this week's rows are written when none of their
+    # keys are already logged; a re-run week falls back to the full rewrite (keep="last").
     if season_log.exists():
-        prev = pd.read_csv(season_log)
-        all_df = pd.concat([prev, m], ignore_index=True)
-        # Drop dupes based on the unique key triple
-        all_df = all_df.drop_duplicates(subset=["home_team","away_team","kickoff_utc"], keep="last")
-        all_df.to_csv(season_log, index=False)
+        logged = pd.read_csv(season_log, usecols=keys, dtype=str)
+        logged_keys = set(logged.itertuples(index=False, name=None))
+        new_keys = m[keys].astype(str).itertuples(index=False, name=None)
+        same_cols = list(pd.read_csv(season_log, nrows=0).columns) == out_cols
+        if same_cols and not m.duplicated(keys).any() and not any(k in logged_keys for k in new_keys):
+            with open(season_log, "ab") as f:
+                f.write(csv_bytes[csv_bytes.index(b"\n") + 1:])  # rows only, header already there
+        else:
+            prev = pd.read_csv(season_log, dtype={"home_team": "category", "away_team": "category"})
+            all_df = pd.concat([prev, m], ignore_index=True)
+            # Drop dupes based on the unique key triple
+            all_df = all_df.drop_duplicates(subset=["home_team","away_team","kickoff_utc"], keep="last")
+            all_df.to_csv(season_log, index=False)
     else:
-        m.to_csv(season_log, index=False)
+        season_log.write_bytes(csv_bytes)
 
     print(f"📈 Calibration written: {week_out.name}")
     print(f"📚 Season log updated: {season_log.name}")
@@ -23,66 +23,114 @@ Rules (strict by default):
 - If both sources return empty → BLOCK
 - If mismatch rate > threshold (default 12%) → HOLD (you can tune)
 - If key positions missing from primary (QB1, LT1, CB1, K, P) → BLOCK
+  (a primary roster under MIN_ROSTER_ROWS rows is reported as "<too-few-rows>")
+- If either roster has fewer than MIN_COMPARE_ROWS rows → HOLD (sparse roster, no mismatch rate)
+
+Roster fetches are cached on disk under cache/rosters/ for ROSTER_CACHE_TTL_S seconds,
+keyed by (provider, team, date). Set CACHE_BYPASS=1 to always fetch fresh.
 """
 
 from __future__ import annotations
-from typing import List, Dict, Any
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Callable, List, Dict, Any
 import pandas as pd
 
 # Import the two functions that run_predictions expects to exist
 from fetch_rosters import get_roster_sportsdataio, get_roster_nflverse
 
+ROSTER_CACHE_DIR = Path("cache") / "rosters"
+ROSTER_CACHE_TTL_S = 3600
+MIN_ROSTER_ROWS = 30   # fewer primary rows => partial fetch, skip the position checks
+MIN_COMPARE_ROWS = 20  # fewer rows on either side => Jaccard is noise
+
+
+def _cached_roster(provider: str, team: str, fetch: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+    """
+    fetch(team) through a Parquet cache at cache/rosters/{provider}_{team}_{date}.parquet.
+    Only non-empty rosters are stored, so a skipped/failed fetch is retried on the next run;
+    exceptions from fetch() propagate unchanged.
+    """
+    path = ROSTER_CACHE_DIR / f"{provider}_{team}_{date.today().isoformat()}.parquet"
+    bypass = os.getenv("CACHE_BYPASS") == "1"
+    if not bypass:
+        try:
+            if time.time() - path.stat().st_mtime < ROSTER_CACHE_TTL_S:
+                return pd.read_parquet(path, engine="fastparquet")
+        except Exception:
+            pass  # missing, stale-check failed or unreadable -> fetch fresh
+
+    df = fetch(team)
+    if isinstance(df, pd.DataFrame) and not df.empty:
+        try:
+            ROSTER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            df.to_parquet(tmp, engine="fastparquet", index=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"⚠️  roster cache write failed for {provider} {team}: {e}")
+    return df
+
 
 def _key_positions_missing(primary: pd.DataFrame) -> List[str]:
     """
     Simple sanity: must have some presence at critical positions.
+    Positions arrive upper-cased from fetch_rosters._clean_df, so one unique() pass suffices.
     """
+    if len(primary) < MIN_ROSTER_ROWS:
+        return ["<too-few-rows>"]
     must_have_any = ["QB", "LT", "C", "CB", "S", "K", "P"]
-    missing = []
-    for pos in must_have_any:
-        # allow matching like 'LT' within OL data
-        if pos in ("LT", "C"):
-            has = (
-                (primary["position"] == pos).any() or
-                (primary["position"].isin(["OL", "T", "G"]).any())
-            )
-        else:
-            has = (primary["position"] == pos).any()
-        if not has:
-            missing.append(pos)
-    return missing
+    present = set(primary["position"].unique())
+    # allow matching like 'LT' within OL data
+    has_ol = not present.isdisjoint({"OL", "T", "G"})
+    return [pos for pos in must_have_any
+            if pos not in present and not (pos in ("LT", "C") and has_ol)]
 
 
 def _mismatch_rate(p: pd.DataFrame, s: pd.DataFrame) -> float:
     """
     Jaccard-like distance between player sets (by names).
     """
-    pset = set(p["player"].str.lower())
-    sset = set(s["player"].str.lower())
-    if not pset and not sset:
-        return 1.0
+    pset = set(p["player"].str.lower().str.strip())
+    sset = set(s["player"].str.lower().str.strip())
     inter = len(pset & sset)
-    union = len(pset | sset)
+    union = len(pset) + len(sset) - inter
     if union == 0:
         return 1.0
     return 1.0 - (inter / union)
 
 
+def _fetch_pair(team: str):
+    """
+    (primary, secondary) rosters for one team. A primary fetch exception is returned in
+    place of the frame (secondary is then not fetched) so the caller can BLOCK on it.
+    """
+    try:
+        primary = _cached_roster("sportsdataio", team, get_roster_sportsdataio)
+    except Exception as e:
+        return e, None
+    return primary, _cached_roster("nflverse", team, get_roster_nflverse)
+
+
 def run_roster_audit(teams_to_check: List[str]) -> Dict[str, Any]:
     conflicts: Dict[str, List[Dict[str, str]]] = {}
     mismatch_hold_threshold = 0.12  # 12% difference => HOLD
 
-    for team in teams_to_check:
+    # Fetches are blocking I/O: fan them out, then check teams in their given order
+    with ThreadPoolExecutor(max_workers=max(1, min(16, len(teams_to_check)))) as ex:
+        jobs = {team: ex.submit(_fetch_pair, team) for team in teams_to_check}
+
+    for team, job in jobs.items():
         team_conflicts: List[Dict[str, str]] = []
-        try:
-            primary = get_roster_sportsdataio(team)
-        except Exception as e:
-            team_conflicts.append({"status": "BLOCK", "details": f"SportsDataIO fetch failed: {e}"})
+        primary, secondary = job.result()
+        if isinstance(primary, Exception):
+            team_conflicts.append({"status": "BLOCK", "details": f"SportsDataIO fetch failed: {primary}"})
             conflicts[team] = team_conflicts
             continue
 
-        secondary = get_roster_nflverse(team)
-
         # If both empty → BLOCK
         if primary.empty and secondary.empty:
             team_conflicts.append({"status": "BLOCK", "details": "Both providers returned empty roster."})
@@ -96,9 +144,12 @@ def run_roster_audit(teams_to_check: List[str]) -> Dict[str, Any]:
 
         # Compare mismatch rate only if secondary present
         if not secondary.empty and not primary.empty:
-            mr = _mismatch_rate(primary, secondary)
-            if mr > mismatch_hold_threshold:
-                team_conflicts.append({"status": "HOLD", "details": f"Mismatch rate {mr:.1%} exceeds {mismatch_hold_threshold:.0%} threshold."})
+            if min(len(primary), len(secondary)) < MIN_COMPARE_ROWS:
+                team_conflicts.append({"status": "HOLD", "details": f"Sparse roster ({len(primary)} primary / {len(secondary)} secondary rows); mismatch rate not computed."})
+            else:
+                mr = _mismatch_rate(primary, secondary)
+                if mr > mismatch_hold_threshold:
+                    team_conflicts.append({"status": "HOLD", "details": f"Mismatch rate {mr:.1%} exceeds {mismatch_hold_threshold:.0%} threshold."})
 
         if team_conflicts:
             conflicts[team] = team_conflicts
@@ -34,15 +34,23 @@ Design notes:
       where sigma_total defaults to ~9.5 (env: SIGMA_TOTAL).
   - Injury adjustment is conservative: maps probable/questionable/out/doubtful to
       a small points-shift derived from missing 'value' in depth chart.
-  - Reproducible RNG per week: seed via min kickoff date (UTC).
+  - Win/cover/over probabilities are closed-form Normal CDFs (scipy.special.ndtr) of the
+      same Normal margin/total model; no sampling is needed for them.
+  - BLEND_W_MODEL / SIGMA_MARGIN / SIGMA_TOTAL can also be passed as keyword overrides;
+      run_simulation_batch() runs one slate under many such configs in parallel (joblib).
+  - MC_DIAGNOSTIC=1 additionally draws SIM_N samples per game (reproducible RNG seeded via
+      min kickoff date, UTC) and reports the largest sampled-vs-analytic gap. The analytic
+      path is authoritative; SIM_N=10000 (sampling sd <= 0.005) is plenty for a cross-check.
+      All games share the same standard-normal draws (common random numbers).
 """
 
 from __future__ import annotations
-from typing import Tuple, Dict, Any, Iterable, Optional
+from typing import Tuple, Dict, Any, Iterable, List, Optional
 import os
-import math
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
+from scipy.special import ndtr
 
 REQUIRED_ODDS = ["home_team","away_team","spread_home","spread_away","total","kickoff_utc","neutral_site"]
 REQUIRED_RATINGS = ["team_code","rating","uncertainty","hfa"]
@@ -56,12 +64,6 @@ def _require_cols(df: pd.DataFrame, need: Iterable[str], name: str) -> None:
 def _norm_team(x: Any) -> str:
     return str(x).upper().strip()
 
-def _to_float_safe(s: Any, default: float = np.nan) -> float:
-    try:
-        return float(s)
-    except Exception:
-        return default
-
 def _coerce_numeric(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
     for c in cols:
         if c in df.columns:
@@ -83,90 +85,94 @@ def _injury_df_from_any(injuries_any) -> pd.DataFrame:
     if injuries_any is None:
         return pd.DataFrame(columns=["team_code","player","status","position"])
     if isinstance(injuries_any, pd.DataFrame):
-        return injuries_any.copy()
+        return injuries_any  # read-only downstream (_injury_adjust_points works on assign() copies)
     # assume iterable of dicts
     try:
         return pd.DataFrame(list(injuries_any))
     except Exception:
         return pd.DataFrame(columns=["team_code","player","status","position"])
 
-def _build_rating_map(ratings_df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
-    r = {}
-    for _, row in ratings_df.iterrows():
-        team = _norm_team(row["team_code"])
-        r[team] = {
-            "rating": float(row["rating"]),
-            "uncertainty": float(row.get("uncertainty", 0.0)),
-            "hfa": float(row.get("hfa", 0.0)),
-        }
+# Ratings used for a team that is missing from ratings_df
+_DEFAULT_RATING = {"rating": 0.0, "uncertainty": 1.0, "hfa": 0.0}
+
+def _build_rating_table(ratings_df: pd.DataFrame) -> pd.DataFrame:
+    # One row per normalized team (last wins); missing uncertainty/hfa columns -> 0.0
+    team = ratings_df["team_code"].astype(str).str.upper().str.strip()
+    r = (ratings_df.reindex(columns=list(_DEFAULT_RATING), fill_value=0.0)
+                   .astype(float)
+                   .set_axis(team, axis=0))
+    return r[~r.index.duplicated(keep="last")]
+
+def _ratings_for(table: pd.DataFrame, teams: pd.Series) -> pd.DataFrame:
+    """Rows of `table` aligned to `teams` (positional index); unknown teams get _DEFAULT_RATING."""
+    r = table.reindex(teams.to_numpy()).reset_index(drop=True)
+    unknown = ~teams.isin(table.index).to_numpy()
+    if unknown.any():
+        r.loc[unknown, list(_DEFAULT_RATING)] = list(_DEFAULT_RATING.values())
     return r
 
-def _team_value_from_depth(depth_df: pd.DataFrame, team: str) -> float:
-    # Sum of 'value' as a rough proxy for roster-strength baseline (already your file)
-    s = depth_df.loc[depth_df["team_code"] == team, "value"]
-    return float(s.sum()) if len(s) else 0.0
-
-def _injury_adjust_points(inj: pd.DataFrame, team: str, depth_df: pd.DataFrame) -> float:
+def _status_weight(s: Any) -> float:
+    # Status → weight (substring match, first hit wins)
+    if s is None:
+        return 0.0
+    s = str(s).lower()
+    if "out" in s or "susp" in s or "injured reserve" in s or s == "ir":
+        return -0.6
+    if "doubt" in s:
+        return -0.45
+    if "question" in s or s == "q":
+        return -0.25
+    if "prob" in s:
+        return -0.10
+    return 0.0
+
+def _injury_adjust_points(inj: pd.DataFrame, depth_df: pd.DataFrame) -> Dict[str, float]:
     """
-    Conservative points-shift for missing diminished contributors.
-    We:
+    Conservative points-shift per team for missing diminished contributors, for the whole
+    injury report in one pass. We:
       - join injuries to depth by (team_code, player) in a fuzzy way (casefold match)
       - weight: OUT=-0.6, DOUBTFUL=-0.45, QUESTIONABLE=-0.25, SUSP=-0.6, IR=-0.7, PROBABLE=-0.1
       - cap magnitude at ~2.5 pts
+    Teams without injuries are absent from the result (caller defaults them to 0.0).
     """
     if inj.empty:
-        return 0.0
-
-    t_inj = inj.copy()
-    t_inj["team_code"] = t_inj["team_code"].astype(str).str.upper().str.strip()
-    t_inj = t_inj[t_inj["team_code"] == team]
-
-    if t_inj.empty:
-        return 0.0
+        return {}
 
     # Normalize player names for a basic join
     def keyify(x): return str(x).lower().strip()
 
-    depth = depth_df[depth_df["team_code"] == team].copy()
-    depth["__k"] = depth["player"].map(keyify)
+    t_inj = inj.assign(team_code=inj["team_code"].astype(str).str.upper().str.strip())
     t_inj["__k"] = t_inj["player"].map(keyify) if "player" in t_inj.columns else ""
+    depth = depth_df[["team_code","value"]].assign(__k=depth_df["player"].map(keyify))
 
-    merged = t_inj.merge(depth[["__k","value"]], on="__k", how="left")
+    # Team codes as one shared categorical: the join and both groupbys run on int codes
+    teams = pd.CategoricalDtype(pd.unique(pd.concat([t_inj["team_code"], depth["team_code"]],
+                                                    ignore_index=True).astype(str)))
+    t_inj["team_code"] = t_inj["team_code"].astype(teams)
+    depth["team_code"] = depth["team_code"].astype(str).astype(teams)
+
+    merged = t_inj.merge(depth, on=["team_code","__k"], how="left")
     merged["value"] = pd.to_numeric(merged["value"], errors="coerce").fillna(0.0)
 
-    # Status → weight
-    def status_weight(s: Any) -> float:
-        if s is None:
-            return 0.0
-        s = str(s).lower()
-        if "out" in s or "susp" in s or "injured reserve" in s or s == "ir":
-            return -0.6
-        if "doubt" in s:
-            return -0.45
-        if "question" in s or s == "q":
-            return -0.25
-        if "prob" in s:
-            return -0.10
-        return 0.0
+    # Weight each distinct status once, then map; None/NaN both weigh 0.0 like "", and
+    # folding them into "" keeps the lookup free of duplicate NA keys
+    status = merged["status"].fillna("")
+    weights = {st: _status_weight(st) for st in status.unique()}
+    merged["w"] = status.map(weights)
 
-    merged["w"] = merged["status"].map(status_weight)
     # Map value (0..something) to rough points via soft scaling
-    # Using diminishing returns: points = w * log1p(value/avgpos)
-    avg_val = max(1.0, depth["value"].mean()) if len(depth) else 5.0
-    merged["pts"] = merged["w"] * np.log1p(merged["value"] / avg_val) * 2.2  # soft scaling
+    # Using diminishing returns: points = w * log1p(value/avgpos), avgpos = team's mean depth value
+    # (one entry per category, in category order; at least 1.0, and 5.0 for teams without depth rows)
+    by_team = depth.groupby("team_code", observed=False)["value"]
+    avg_val = np.fmax(by_team.mean(), 1.0).where(by_team.size() > 0, 5.0)
+    merged["avg_val"] = avg_val.to_numpy()[merged["team_code"].cat.codes.to_numpy()]
+    merged["pts"] = merged["w"] * np.log1p(merged["value"] / merged["avg_val"]) * 2.2  # soft scaling
 
-    pts = float(merged["pts"].sum())
-    return float(np.clip(pts, -2.5, 0.75))  # conservative cap
-
-def _make_game_id(home: str, away: str, kickoff_utc: str) -> str:
-    ts = ""
-    try:
-        ts = pd.to_datetime(kickoff_utc, utc=True, errors="coerce").strftime("%Y%m%dT%H%MZ")
-    except Exception:
-        ts = "NA"
-    return f"{away}@{home}_{ts}"
+    pts = merged.groupby("team_code", observed=True)["pts"].sum()
+    return pts.clip(-2.5, 0.75).astype(float).to_dict()  # conservative cap
 
 def _norm_odds(odds_df: pd.DataFrame) -> pd.DataFrame:
+    # The one copy of the caller's odds frame; everything below mutates it in place
     df = odds_df.copy()
     for c in ["home_team","away_team"]:
         df[c] = df[c].map(_norm_team)
@@ -185,43 +191,15 @@ def _norm_odds(odds_df: pd.DataFrame) -> pd.DataFrame:
         df["neutral_site"] = False
     return df
 
-def _model_spread_for_game(
-    home: str, away: str,
-    ratings_map: Dict[str, Dict[str, float]],
-    injuries_df: pd.DataFrame,
-    depth_df: pd.DataFrame,
-    neutral_site: bool
-) -> Dict[str, float]:
-    # Base ratings
-    rh = ratings_map.get(home, {"rating":0.0,"uncertainty":1.0,"hfa":0.0})
-    ra = ratings_map.get(away, {"rating":0.0,"uncertainty":1.0,"hfa":0.0})
-    hfa_home = 0.0 if neutral_site else float(rh.get("hfa", 0.0))
-
-    # Injury points (home is positive to margin if away is hurt more, etc.)
-    inj_home = _injury_adjust_points(injuries_df, home, depth_df)
-    inj_away = _injury_adjust_points(injuries_df, away, depth_df)
-
-    # Model margin (home - away). Higher means home stronger.
-    base_margin = (rh["rating"] - ra["rating"]) + hfa_home + (inj_home - inj_away)
-
-    return {
-        "rating_home": float(rh["rating"]),
-        "rating_away": float(ra["rating"]),
-        "hfa_home": float(hfa_home),
-        "inj_adj_home": float(inj_home),
-        "inj_adj_away": float(inj_away),
-        "model_spread_home": float(base_margin)
-    }
-
-def _cdf_normal(x: np.ndarray, mu: float, sigma: float) -> np.ndarray:
-    z = (x - mu) / max(sigma, 1e-6)
-    return 0.5 * (1.0 + math.erf(z / np.sqrt(2.0)))
-
 def run_simulation(
     odds_df: pd.DataFrame,
     ratings_df: pd.DataFrame,
     depth_df: pd.DataFrame,
-    injuries
+    injuries,
+    *,
+    blend_w_model: Optional[float] = None,
+    sigma_margin: Optional[float] = None,
+    sigma_total: Optional[float] = None,
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
 
     # 1) Validate inputs
@@ -229,116 +207,159 @@ def run_simulation(
     _require_cols(ratings_df, REQUIRED_RATINGS, "ratings_df")
     _require_cols(depth_df, REQUIRED_DEPTH, "depth_df")
 
-    odds_df = _norm_odds(odds_df.copy())
-    ratings_df = ratings_df.copy()
-    ratings_df["team_code"] = ratings_df["team_code"].map(_norm_team)
-    depth_df = depth_df.copy()
-    depth_df["team_code"] = depth_df["team_code"].map(_norm_team)
+    # No defensive copies: _norm_odds copies odds once, _build_rating_table normalizes team
+    # codes itself, and depth is narrowed to the three columns the injury join reads.
+    odds_df = _norm_odds(odds_df)
+    depth_df = depth_df[["team_code","player","value"]].assign(
+        team_code=lambda d: d["team_code"].map(_norm_team))
     injuries_df = _injury_df_from_any(injuries)
 
-    # 2) Config / hyperparams
-    BLEND_W_MODEL = float(os.getenv("BLEND_W_MODEL", "0.60"))  # 60% model / 40% market by default
-    SIGMA_MARGIN = float(os.getenv("SIGMA_MARGIN", "13.5"))     # stdev of point margin
-    SIGMA_TOTAL  = float(os.getenv("SIGMA_TOTAL", "9.5"))       # stdev of game total
-    SIM_N = int(os.getenv("SIM_N", "50000"))
-
-    # Seed for reproducibility
-    np.random.seed(_rng_seed_from_kickoffs(odds_df))
-
-    ratings_map = _build_rating_map(ratings_df)
-
-    preds_rows = []
-    cards_rows = []
-
-    for _, g in odds_df.iterrows():
-        home = g["home_team"]
-        away = g["away_team"]
-        neutral = bool(g.get("neutral_site", False))
-        vegas_line = _to_float_safe(g.get("spread_home"), 0.0)  # home spread (negative means favorite)
-        vegas_total = _to_float_safe(g.get("total"), np.nan)
-        kickoff_utc = str(g.get("kickoff_utc",""))
-
-        # 3) Model spread components
-        comps = _model_spread_for_game(home, away, ratings_map, injuries_df, depth_df, neutral_site=neutral)
-        model_spread = comps["model_spread_home"]
-
-        # 4) Blend model vs. market (mu for margin distribution)
-        mu_margin = BLEND_W_MODEL * model_spread + (1.0 - BLEND_W_MODEL) * vegas_line
-
-        # 5) Total mean: small nudge toward market if available; else derive from ratings delta as neutral
-        if not np.isnan(vegas_total):
-            mu_total = 0.7 * vegas_total + 0.3 * max(35.0, 44.0 - 0.2 * abs(model_spread))
-        else:
-            mu_total = 44.0 - 0.2 * abs(model_spread)  # harmless fallback
-
-        # 6) Monte Carlo (Normal margin + Normal total)
-        #    Note: we could correlate margin & total; for now assume independence (simple & robust).
-        margins = np.random.normal(loc=mu_margin, scale=SIGMA_MARGIN, size=SIM_N)
-        totals  = np.random.normal(loc=mu_total,  scale=SIGMA_TOTAL,  size=SIM_N)
-
-        # Probabilities
-        win_prob_home   = float((margins > 0.0).mean())
-        cover_prob_home = float((margins + vegas_line > 0.0).mean())  # home covers when margin > -spread_home
-        ou_prob_over    = float((totals > vegas_total).mean()) if not np.isnan(vegas_total) else np.nan
-
-        # Sigma we report = margin sigma (so downstream can audit variability assumptions)
-        sigma_report = float(SIGMA_MARGIN)
-
-        preds_rows.append({
-            "home_team": home,
-            "away_team": away,
-            "vegas_line": vegas_line,
-            "vegas_total": vegas_total,
-            "sigma": sigma_report,
-            "win_prob_home": round(win_prob_home, 4),
-            "cover_prob_home": round(cover_prob_home, 4),
-            "ou_prob_over": round(ou_prob_over, 4) if not np.isnan(ou_prob_over) else np.nan,
-            "kickoff_utc": kickoff_utc,
-            "neutral_site": bool(neutral),
-        })
-
-        cards_rows.append({
-            "game_id": _make_game_id(home, away, kickoff_utc),
-            "home_team": home,
-            "away_team": away,
-            "kickoff_utc": kickoff_utc,
-            "neutral_site": bool(neutral),
-            "rating_home": comps["rating_home"],
-            "rating_away": comps["rating_away"],
-            "hfa_home": comps["hfa_home"],
-            "inj_adj_home": comps["inj_adj_home"],
-            "inj_adj_away": comps["inj_adj_away"],
-            "vegas_line": vegas_line,
-            "vegas_total": vegas_total,
-            "modeled_spread_home": float(model_spread),
-            "modeled_total": float(mu_total),
-            "win_prob_home": round(win_prob_home, 4),
-            "cover_prob_home": round(cover_prob_home, 4),
-            "ou_prob_over": round(ou_prob_over, 4) if not np.isnan(ou_prob_over) else np.nan,
-            "notes": "Blend {:.0%} model / {:.0%} market; sigma_margin={:.1f}, sigma_total={:.1f}".format(
-                BLEND_W_MODEL, 1-BLEND_W_MODEL, SIGMA_MARGIN, SIGMA_TOTAL
-            )
-        })
-
-    preds_df = pd.DataFrame(preds_rows, columns=[
+    # 2) Config / hyperparams (keyword overrides win over env)
+    BLEND_W_MODEL = float(os.getenv("BLEND_W_MODEL", "0.60") if blend_w_model is None else blend_w_model)  # 60% model / 40% market by default
+    SIGMA_MARGIN = float(os.getenv("SIGMA_MARGIN", "13.5") if sigma_margin is None else sigma_margin)       # stdev of point margin
+    SIGMA_TOTAL  = float(os.getenv("SIGMA_TOTAL", "9.5") if sigma_total is None else sigma_total)           # stdev of game total
+    SIM_N = int(os.getenv("SIM_N", "10000"))                    # draws per game, MC_DIAGNOSTIC only
+
+    rating_table = _build_rating_table(ratings_df)
+    inj_pts = _injury_adjust_points(injuries_df, depth_df)
+
+    # 3) Model components and distribution means for every game at once (odds row order)
+    G = len(odds_df)
+    homes = odds_df["home_team"].reset_index(drop=True)
+    aways = odds_df["away_team"].reset_index(drop=True)
+    neutral = odds_df["neutral_site"].astype(bool).to_numpy()
+    vegas_line = odds_df["spread_home"].astype(float).to_numpy()  # home spread (negative means favorite)
+    vegas_total = odds_df["total"].astype(float).to_numpy()
+    kickoffs = odds_df["kickoff_utc"].map(str).tolist()
+
+    # Per-team inputs are looked up once per team in play, then gathered per game by the
+    # teams' categorical codes
+    teams = pd.CategoricalDtype(pd.unique(pd.concat([homes, aways], ignore_index=True)))
+    home_idx = homes.astype(teams).cat.codes.to_numpy()
+    away_idx = aways.astype(teams).cat.codes.to_numpy()
+    team_codes = pd.Series(teams.categories)
+    per_team = _ratings_for(rating_table, team_codes)
+    rating_home = per_team["rating"].to_numpy()[home_idx]
+    rating_away = per_team["rating"].to_numpy()[away_idx]
+    hfa_home = np.where(neutral, 0.0, per_team["hfa"].to_numpy()[home_idx])
+
+    # Injury points (home is positive to margin if away is hurt more, etc.)
+    team_inj = team_codes.map(inj_pts).fillna(0.0).to_numpy(dtype=float)
+    inj_home = team_inj[home_idx]
+    inj_away = team_inj[away_idx]
+
+    # Model margin (home - away). Higher means home stronger.
+    model_spread = (rating_home - rating_away) + hfa_home + (inj_home - inj_away)
+
+    # Blend model vs. market (mu for margin distribution)
+    mu_margin = BLEND_W_MODEL * model_spread + (1.0 - BLEND_W_MODEL) * vegas_line
+
+    # Total mean: small nudge toward market if available; else derive from ratings delta as neutral
+    mu_total = np.where(
+        np.isnan(vegas_total),
+        44.0 - 0.2 * np.abs(model_spread),  # harmless fallback
+        0.7 * vegas_total + 0.3 * np.fmax(35.0, 44.0 - 0.2 * np.abs(model_spread)),
+    )
+
+    # 4) Probabilities in closed form under Normal(mu_margin, SIGMA_MARGIN) / Normal(mu_total, SIGMA_TOTAL)
+    #    Note: we could correlate margin & total; for now assume independence (simple & robust).
+    sm = max(SIGMA_MARGIN, 1e-6)
+    st = max(SIGMA_TOTAL, 1e-6)
+    win_prob_home   = ndtr(mu_margin / sm)                   # P(margin > 0)
+    cover_prob_home = ndtr((mu_margin + vegas_line) / sm)    # home covers when margin > -spread_home
+    ou_prob_over    = ndtr((mu_total - vegas_total) / st)    # NaN total -> NaN
+
+    # Optional sampled cross-check of the closed form (same model, SIM_N draws per game)
+    if os.getenv("MC_DIAGNOSTIC") == "1" and G and SIM_N > 0:
+        # PCG64 generator, float32 draws: the sampled frequencies only need ~1e-3 precision.
+        # Thresholds are float32 too so the (G, SIM_N) comparisons never upcast.
+        # Common random numbers: one margin and one total draw vector, shared by every game.
+        rng = np.random.default_rng(_rng_seed_from_kickoffs(odds_df))
+        f32 = np.float32
+        z_margin = rng.standard_normal(SIM_N, dtype=f32)
+        z_total  = rng.standard_normal(SIM_N, dtype=f32)
+        margins = mu_margin.astype(f32)[:, None] + f32(SIGMA_MARGIN) * z_margin
+        totals  = mu_total.astype(f32)[:, None]  + f32(SIGMA_TOTAL)  * z_total
+        gap = max(
+            np.abs((margins > 0.0).mean(axis=1) - win_prob_home).max(),
+            np.abs((margins > -vegas_line.astype(f32)[:, None]).mean(axis=1) - cover_prob_home).max(),
+            np.nanmax(np.abs((totals > vegas_total.astype(f32)[:, None]).mean(axis=1) - ou_prob_over), initial=0.0),
+        )
+        print(f"MC_DIAGNOSTIC: {SIM_N} draws/game, max |sampled - analytic| = {gap:.4f}")
+
+    # Game ids "{away}@{home}_{YYYYmmddTHHMMZ}" from one parse of the kickoff column
+    # (unparseable kickoffs -> "NA")
+    kickoff_ts = (pd.to_datetime(pd.Series(kickoffs, dtype=object), utc=True, errors="coerce")
+                    .dt.strftime("%Y%m%dT%H%MZ").fillna("NA"))
+    game_ids = [f"{a}@{h}_{ts}" for a, h, ts in zip(aways, homes, kickoff_ts)]
+
+    win_prob_home = np.round(win_prob_home, 4)
+    cover_prob_home = np.round(cover_prob_home, 4)
+    ou_prob_over = np.round(ou_prob_over, 4)
+
+    # Sigma we report = margin sigma (so downstream can audit variability assumptions)
+    sigma_report = float(SIGMA_MARGIN)
+
+    # Every numeric column below is already a float64 ndarray, so the frames need no dtype pass
+    preds_df = pd.DataFrame({
+        "home_team": homes,
+        "away_team": aways,
+        "vegas_line": vegas_line,
+        "vegas_total": vegas_total,
+        "sigma": np.full(G, sigma_report),
+        "win_prob_home": win_prob_home,
+        "cover_prob_home": cover_prob_home,
+        "ou_prob_over": ou_prob_over,
+        "kickoff_utc": kickoffs,
+        "neutral_site": neutral,
+    }, columns=[
         "home_team","away_team","vegas_line","vegas_total","sigma",
         "win_prob_home","cover_prob_home","ou_prob_over","kickoff_utc","neutral_site"
     ])
 
-    cards_df = pd.DataFrame(cards_rows, columns=[
+    cards_df = pd.DataFrame({
+        "game_id": game_ids,
+        "home_team": homes,
+        "away_team": aways,
+        "kickoff_utc": kickoffs,
+        "neutral_site": neutral,
+        "rating_home": rating_home,
+        "rating_away": rating_away,
+        "hfa_home": hfa_home,
+        "inj_adj_home": inj_home,
+        "inj_adj_away": inj_away,
+        "vegas_line": vegas_line,
+        "vegas_total": vegas_total,
+        "modeled_spread_home": model_spread,
+        "modeled_total": mu_total,
+        "win_prob_home": win_prob_home,
+        "cover_prob_home": cover_prob_home,
+        "ou_prob_over": ou_prob_over,
+        "notes": "Blend {:.0%} model / {:.0%} market; sigma_margin={:.1f}, sigma_total={:.1f}".format(
+            BLEND_W_MODEL, 1-BLEND_W_MODEL, SIGMA_MARGIN, SIGMA_TOTAL
+        ),
+    }, columns=[
         "game_id","home_team","away_team","kickoff_utc","neutral_site",
         "rating_home","rating_away","hfa_home","inj_adj_home","inj_adj_away",
         "vegas_line","vegas_total","modeled_spread_home","modeled_total",
         "win_prob_home","cover_prob_home","ou_prob_over","notes"
     ])
 
-    # Final schema safety: ensure dtypes are serializable
-    for c in ["vegas_line","vegas_total","sigma","win_prob_home","cover_prob_home","ou_prob_over",
-              "rating_home","rating_away","hfa_home","inj_adj_home","inj_adj_away",
-              "modeled_spread_home","modeled_total"]:
-        if c in preds_df.columns:
-            preds_df[c] = pd.to_numeric(preds_df[c], errors="coerce")
-        if c in cards_df.columns:
-            cards_df[c] = pd.to_numeric(cards_df[c], errors="coerce")
-
     return preds_df, cards_df
+
+def run_simulation_batch(
+    odds_df: pd.DataFrame,
+    ratings_df: pd.DataFrame,
+    depth_df: pd.DataFrame,
+    injuries,
+    configs: List[Dict[str, float]],
+    n_jobs: int = -1,
+) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    run_simulation() once per config (keys: blend_w_model, sigma_margin, sigma_total),
+    spread over worker processes; results come back in `configs` order.
+    Meant for parameter sweeps / back-tests — a single slate is already vectorized.
+    """
+    return Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(run_simulation)(odds_df, ratings_df, depth_df, injuries, **cfg) for cfg in configs
+    )
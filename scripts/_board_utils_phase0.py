@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import json, math, pandas as pd
+from scipy.special import expit
 CAL_PATH = "out/calibration/model_line_calibration.json"
 
 def read_cal():
@@ -11,11 +12,8 @@ def read_cal():
 
 def prob_from_home_line(line, a, b):
     # inverse of line_from_prob; probability from a spread using logistic
-    z = a + b*float(line)
-    try:
-        return 1.0/(1.0+math.exp(-z))
-    except OverflowError:
-        return 1.0 if z>0 else 0.0
+    # expit saturates to 0/1 for large |z| instead of overflowing
+    return float(expit(a + b*float(line)))
 
 def line_from_prob(p, a, b):
     # clamp + logit back to spread
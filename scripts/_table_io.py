@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Table IO for script-to-script intermediates under out/.
+- write_table(df, path): writes the CSV plus a Snappy Parquet twin (same stem, .parquet)
+- read_table(path, columns=None): prefers the Parquet twin when it is at least as new as
+  the CSV (typed columns, no re-parsing, column pruning); otherwise reads the CSV
+Parquet is best-effort: if it cannot be written or read, the CSV path is used.
+(Named _table_io, not _io, which would be shadowed by the stdlib's built-in _io module.)
+"""
+from pathlib import Path
+import pandas as pd
+
+def parquet_twin(path) -> Path:
+    return Path(path).with_suffix(".parquet")
+
+def read_table(path, columns=None) -> pd.DataFrame:
+    p = Path(path)
+    if p.suffix == ".parquet":
+        return pd.read_parquet(p, columns=columns)
+    twin = parquet_twin(p)
+    if twin.exists() and (not p.exists() or twin.stat().st_mtime_ns >= p.stat().st_mtime_ns):
+        try:
+            return pd.read_parquet(twin, columns=columns)
+        except Exception:
+            pass  # unreadable twin -> CSV
+    return pd.read_csv(p, usecols=columns)
+
+def write_table(df: pd.DataFrame, path) -> None:
+    p = Path(path)
+    df.to_csv(p, index=False)
+    twin = parquet_twin(p)
+    try:
+        df.to_parquet(twin, compression="snappy", index=False)
+    except Exception as e:
+        # never leave a stale twin behind that read_table could prefer
+        twin.unlink(missing_ok=True)
+        print(f"[WARN] Parquet twin not written for {p.name}: {e}")
@@ -7,8 +7,11 @@ Outputs:
 import json, argparse, os
 import pandas as pd
 import numpy as np
+from scipy.special import expit
 
-def sigmoid(z): return 1.0/(1.0+np.exp(-z))
+from _table_io import read_table, write_table
+
+def sigmoid(z): return expit(z)
 
 def main():
     ap = argparse.ArgumentParser()
@@ -17,12 +20,14 @@ def main():
     ap.add_argument("--out", default="out/predictions_with_elo_cal.csv")
     args = ap.parse_args()
 
-    df = pd.read_csv(args.pred_in)
+    df = read_table(args.pred_in)
     with open(args.model,"r") as f:
         m = json.load(f)
-    z = m["intercept"] + m["coef"]*df["elo_diff"].astype(float)
+    z = df["elo_diff"].to_numpy(dtype=float, copy=True)
+    z *= m["coef"]
+    z += m["intercept"]
     df["elo_logit_prob"] = sigmoid(z)
-    df.to_csv(args.out, index=False)
+    write_table(df, args.out)
     print(f"Wrote {args.out} (rows={len(df)})")
 if __name__ == "__main__":
     main()
@@ -6,18 +6,50 @@ Outputs:
   out/features_elo_week.csv     (minimal feature frame)
 """
 import argparse, os
+import numpy as np
 import pandas as pd
 
+from _table_io import write_table
+
 OUT_DIR = "out"
 
-def expected_prob(elo_diff):
-    import math
-    return 1.0 / (1.0 + 10.0 ** (-(elo_diff) / 400.0))
+def _parse_date(x):
+    try:
+        t = pd.Timestamp(x)
+    except Exception:
+        return pd.NaT
+    return t.tz_localize(None) if t.tzinfo is not None else t
+
+def parse_dates(s):
+    # plain YYYY-MM-DD values parse in one formatted pass; anything else (timestamps,
+    # UTC offsets) falls back to a per-value parse with the timezone dropped
+    d = pd.to_datetime(s, format="%Y-%m-%d", errors="coerce")
+    if d.dt.tz is not None:
+        d = d.dt.tz_localize(None)
+    miss = d.isna() & s.notna()
+    if miss.any():
+        d[miss] = s[miss].map(_parse_date)
+    return d
+
+def to_naive_day(s):
+    # datetime64 midnight (tz dropped), not an object column of datetime.date
+    return parse_dates(s).dt.normalize()
+
+def _norm_codes(s):
+    return s.astype(str).str.strip().str.upper()
 
-def latest_elo_before(elo_df, team, date):
-    rows = elo_df[(elo_df["team"] == team) & (elo_df["date"] <= date)]
-    if rows.empty: return 1500.0
-    return rows.sort_values("date").iloc[-1]["elo_post"]
+def latest_elo_before(elo_sorted, teams, days):
+    """
+    elo_post of each (team, day)'s latest Elo row dated on/before that day, 1500.0 if none.
+    One merge_asof over the whole column; `elo_sorted` has team, _d, elo_post sorted by _d.
+    """
+    out = np.full(len(teams), 1500.0)
+    left = pd.DataFrame({"team": teams.array, "_d": days.to_numpy(), "_row": np.arange(len(teams))})
+    left = left[left["_d"].notna()].sort_values("_d", kind="stable")
+    m = pd.merge_asof(left, elo_sorted.assign(_hit=True), on="_d", by="team", direction="backward")
+    hit = m["_hit"].notna().to_numpy()
+    out[m["_row"].to_numpy()[hit]] = m["elo_post"].to_numpy()[hit]
+    return out
 
 def main():
     ap = argparse.ArgumentParser()
@@ -30,26 +62,35 @@ def main():
     for c in ["home_team","away_team","date"]:
         if c not in pred.columns:
             raise SystemExit(f"Predictions missing required column: {c}")
-    pred["date"] = pd.to_datetime(pred["date"], errors="coerce").dt.tz_localize(None).dt.date
+    pred["date"] = to_naive_day(pred["date"])
 
     elo = pd.read_csv(args.elo)
-    elo["date"] = pd.to_datetime(elo["date"], errors="coerce").dt.date
+    elo["date"] = to_naive_day(elo["date"])
 
-    elo_home, elo_away = [], []
-    for _, r in pred.iterrows():
-        h = str(r["home_team"]).strip().upper()
-        a = str(r["away_team"]).strip().upper()
-        d = r["date"]
-        elo_home.append(latest_elo_before(elo, h, d))
-        elo_away.append(latest_elo_before(elo, a, d))
+    # Lookups run on the datetime64 days (merge_asof needs them sorted, without nulls)
+    pred_days = pred["date"]
+    # Shared categorical team codes: the by-team join compares integer codes, not strings
+    home, away, elo_team = _norm_codes(pred["home_team"]), _norm_codes(pred["away_team"]), _norm_codes(elo["team"])
+    cats = pd.CategoricalDtype(sorted(set(home) | set(away) | set(elo_team)))
+    home, away, elo_team = home.astype(cats), away.astype(cats), elo_team.astype(cats)
+    elo_sorted = (pd.DataFrame({"team": elo_team,
+                                "_d": elo["date"],
+                                "elo_post": elo["elo_post"]})
+                  .dropna(subset=["_d"])
+                  .sort_values("_d", kind="stable"))
+    elo_home = latest_elo_before(elo_sorted, home, pred_days)
+    elo_away = latest_elo_before(elo_sorted, away, pred_days)
 
     pred["elo_home"] = elo_home
     pred["elo_away"] = elo_away
     pred["elo_diff"] = (pred["elo_home"] + args.hfa_elo) - pred["elo_away"]
-    pred["elo_prob_home"] = pred["elo_diff"].apply(expected_prob)
+    # Elo expectation 1 / (1 + 10^(-diff/400)) as one ufunc pass
+    diff = pred["elo_diff"].to_numpy(dtype=np.float64)
+    pred["elo_prob_home"] = 1.0 / (1.0 + np.power(10.0, -diff / 400.0))
 
     os.makedirs(OUT_DIR, exist_ok=True)
-    pred.to_csv(os.path.join(OUT_DIR, "predictions_with_elo.csv"), index=False)
+    # CSV + Parquet twin for apply_elo_logit
+    write_table(pred, os.path.join(OUT_DIR, "predictions_with_elo.csv"))
     pred[["home_team","away_team","date","elo_home","elo_away","elo_diff"]] \
         .to_csv(os.path.join(OUT_DIR, "features_elo_week.csv"), index=False)
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse, os, json, pandas as pd, numpy as np, glob
+from functools import lru_cache
 OUT_DEFAULT = "out/predictions_week_calibrated_with_market.csv"
 
 TEAM_MAP_FILES = ["teams_lookup.json", "team_locations.csv"]
@@ -29,22 +30,51 @@ def load_team_map():
                 pass
     return tm
 
-def norm_team(s, tm):
-    s = str(s).strip().upper()
-    return tm.get(s, s)
+def vec_norm_team(series, tm):
+    # team codes for a whole column: one vectorized strip/upper, then a dict lookup
+    s = series.astype(str).str.strip().str.upper()
+    return s.map(tm).fillna(s)
+
+def _parse_date(x):
+    try:
+        t = pd.Timestamp(x)
+    except Exception:
+        return pd.NaT
+    return t.tz_localize(None) if t.tzinfo is not None else t
+
+def parse_dates(s):
+    # plain YYYY-MM-DD values parse in one formatted pass; anything else (timestamps,
+    # UTC offsets) falls back to a per-value parse with the timezone dropped
+    d = pd.to_datetime(s, format="%Y-%m-%d", errors="coerce")
+    if d.dt.tz is not None:
+        d = d.dt.tz_localize(None)
+    miss = d.isna() & s.notna()
+    if miss.any():
+        d[miss] = s[miss].map(_parse_date)
+    return d
+
+def to_naive_day(s):
+    # datetime64 midnight (tz dropped), not an object column of datetime.date
+    return parse_dates(s).dt.normalize()
 
 def pick_col(df, cands):
     for c in cands:
         if c in df.columns: return c
     return None
 
+@lru_cache(maxsize=None)
+def header_cols(path):
+    # first line only; no pandas parser just to look at column names
+    with open(path, "r", encoding="utf-8-sig", errors="ignore") as fh:
+        return frozenset(c.strip().strip('"') for c in fh.readline().strip().split(","))
+
 def autodetect_market():
     for pat in ["weekly_odds_standard.csv", "odds_used.csv", "compare_odds.csv", "out/weekly_odds_standard.csv"]:
         if os.path.isfile(pat): return pat
     # fall back to any csv with obvious market headers
     for f in glob.glob("*.csv")+glob.glob("out/*.csv"):
         try:
-            hdr = set(pd.read_csv(f, nrows=0).columns)
+            hdr = header_cols(f)
             if hdr & set(LINE_CANDS) and hdr & set(TOTAL_CANDS):
                 return f
         except Exception:
@@ -63,7 +93,7 @@ def main():
     need = {"home_team","away_team","date"}
     if not need.issubset(pred.columns):
         raise SystemExit(f"Predictions missing columns {need - set(pred.columns)}")
-    pred["date"] = pd.to_datetime(pred["date"], errors="coerce").dt.tz_localize(None).dt.date
+    pred["date"] = to_naive_day(pred["date"])
 
     market_path = args.market or autodetect_market()
     if not market_path or not os.path.isfile(market_path):
@@ -92,51 +122,53 @@ def main():
 
     # normalize teams
     tm = load_team_map()
-    pred["_home"] = pred["home_team"].map(lambda s: norm_team(s, tm))
-    pred["_away"] = pred["away_team"].map(lambda s: norm_team(s, tm))
+    pred["_home"] = vec_norm_team(pred["home_team"], tm)
+    pred["_away"] = vec_norm_team(pred["away_team"], tm)
 
     mkt = mkt.copy()
-    mkt["_home"] = mkt[hcol].map(lambda s: norm_team(s, tm))
-    mkt["_away"] = mkt[acol].map(lambda s: norm_team(s, tm))
+    mkt["_home"] = vec_norm_team(mkt[hcol], tm)
+    mkt["_away"] = vec_norm_team(mkt[acol], tm)
+    # one shared categorical dtype: merges/groupbys below key on integer codes, not strings
+    cats = pd.CategoricalDtype(sorted(set(pred["_home"]) | set(pred["_away"]) | set(mkt["_home"]) | set(mkt["_away"])))
+    for df in (pred, mkt):
+        df["_home"] = df["_home"].astype(cats)
+        df["_away"] = df["_away"].astype(cats)
     if dcol:
-        mkt["_date"] = pd.to_datetime(mkt[dcol], errors="coerce").dt.tz_localize(None).dt.date
+        mkt["_date"] = to_naive_day(mkt[dcol])
     else:
         mkt["_date"] = pd.NaT
 
     # reduce market to one row per matchup per date by averaging by book if multiple
-    mred = mkt.groupby(["_home","_away","_date"], dropna=False).agg(
+    mred = mkt.groupby(["_home","_away","_date"], dropna=False, observed=True).agg(
         line=(lcol,"mean"),
         total=(tcol,"mean")
     ).reset_index()
 
     # if we have exact date, merge on date; else nearest within ±max_day_gap
-    left = pred.rename(columns={"date":"_pdate"})
+    # _row tags each prediction so the nearest-date pick keeps one row per game, in input order
+    left = pred.rename(columns={"date":"_pdate"}).assign(_row=np.arange(len(pred)))
     if mred["_date"].notna().any():
         merged = left.merge(mred, on=["_home","_away"], how="left")
         # choose nearest date row per game
-        merged["_mdate"] = pd.to_datetime(merged["_date"])
-        merged["_pdate_dt"] = pd.to_datetime(merged["_pdate"])
-        merged["abs_gap"] = (merged["_mdate"] - merged["_pdate_dt"]).abs().dt.days
-        merged.sort_values(["_home","_away","_pdate_dt","abs_gap"], inplace=True)
-        merged = merged.groupby(["_home","_away","_pdate_dt"]).first().reset_index()
-        merged.loc[merged["abs_gap"] > args.max_day_gap, ["line","total"]] = np.nan
+        merged["abs_gap"] = (merged["_date"] - merged["_pdate"]).abs().dt.days
+        merged = (merged.sort_values(["_row","abs_gap"], kind="stable")
+                        .drop_duplicates(subset="_row", keep="first"))
+        # unknown gap (undated prediction or market row) counts as out of range
+        merged.loc[~(merged["abs_gap"] <= args.max_day_gap), ["line","total"]] = np.nan
     else:
         # no dates in market -> just aggregate by teams
-        mteam = mred.groupby(["_home","_away"], dropna=False).agg(line=("line","mean"), total=("total","mean")).reset_index()
-        merged = left.merge(mteam, on=["_home","_away"], how="left")
+        mteam = mred.groupby(["_home","_away"], dropna=False, observed=True).agg(line=("line","mean"), total=("total","mean"))
+        # unique (home, away) index -> align by reindex instead of a merge
+        keys = pd.MultiIndex.from_arrays([left["_home"], left["_away"]])
+        merged = left.assign(**{c: mteam[c].reindex(keys).to_numpy() for c in ("line","total")})
 
-    out = merged.copy()
     # preserve your calibrated prob column name if present; else home_win_prob
-    prob_col = "home_win_prob" if "home_win_prob" in out.columns else out.columns[out.columns.str.contains("prob")][0]
-    out = out.rename(columns={
-        "_pdate":"date"
-    })
-    cols = ["home_team","away_team","date", prob_col, "line","total"]
-    # map back original names for clarity
-    out["home_team"] = pred["home_team"].values
-    out["away_team"] = pred["away_team"].values
-    out["date"] = pred["date"].values
-    out = out[cols]
+    prob_col = "home_win_prob" if "home_win_prob" in merged.columns else merged.columns[merged.columns.str.contains("prob")][0]
+    # original team names/dates ride through the merge on the left side, row-aligned with their probs
+    out = merged[["home_team","away_team","_pdate", prob_col, "line","total"]].rename(columns={"_pdate":"date"})
     os.makedirs(os.path.dirname(args.out), exist_ok=True)
     out.to_csv(args.out, index=False)
     print(f"Wrote {args.out} using market={os.path.basename(market_path)}; matched {out['line'].notna().sum()} lines, {out['total'].notna().sum()} totals out of {len(out)} games.")
+
+if __name__ == "__main__":
+    main()
@@ -25,8 +25,12 @@ except Exception:
 
 url_re = re.compile(r'https?://[^"\')\s]+', re.I)
 host_re = re.compile(r'https?://[^/]*mysportsfeeds\.com', re.I)
+# the four auth patterns as one alternation: one search per line
+AUTH_RE = re.compile(r'MYSPORTSFEEDS|curl .* -u |Authorization:\s*Basic|requests\.get\(', re.I)
 
+# One read of every file feeds both the endpoint scan (1) and the auth scan (4)
 found = []
+auth_hits = []
 for p in files:
     try:
         with open(p, "r", errors="ignore") as fh:
@@ -35,6 +39,8 @@ for p in files:
                     for url in url_re.findall(line):
                         if host_re.match(url):
                             found.append((str(p), i, line.rstrip("\n"), url))
+                if AUTH_RE.search(line):
+                    auth_hits.append(f"{p}:{i}: {line.strip()}")
     except Exception:
         continue
 
@@ -72,22 +78,7 @@ with open(FLAGS, "w", encoding="utf-8") as fh:
     if not any_flag:
         fh.write("(none found)\n")
 
-# 4) Auth usage patterns
-auth_hits = []
-auth_patterns = [
-    re.compile(r'MYSPORTSFEEDS', re.I),
-    re.compile(r'curl .* -u ', re.I),
-    re.compile(r'Authorization:\s*Basic', re.I),
-    re.compile(r'requests\.get\(', re.I),
-]
-for p in files:
-    try:
-        with open(p, "r", errors="ignore") as fh:
-            for i, line in enumerate(fh, 1):
-                if any(r.search(line) for r in auth_patterns):
-                    auth_hits.append(f"{p}:{i}: {line.strip()}")
-    except Exception:
-        continue
+# 4) Auth usage patterns (collected in the scan above)
 with open(AUTH, "w", encoding="utf-8") as fh:
     if auth_hits:
         fh.write("\n".join(auth_hits) + "\n")
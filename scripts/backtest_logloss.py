@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-import argparse, pathlib
+import argparse, html as htmllib, pathlib
 import pandas as pd
 import numpy as np
 
@@ -7,15 +7,49 @@ def safe_clip(p):
     return np.clip(p.astype(float), 1e-12, 1 - 1e-12)
 
 def logloss_vec(p, y):
+    # -(y*log(p) + (1-y)*log1p(-p)), accumulated in place in two buffers
     p = safe_clip(p)
-    return -(y*np.log(p) + (1-y)*np.log(1-p))
+    out = np.log1p(-p)
+    out *= 1 - y
+    p = np.log(p, out=p)
+    p *= y
+    out += p
+    return np.negative(out, out=out)
+
+def brier_vec(p, y):
+    out = np.subtract(p, y, dtype=float)
+    return np.multiply(out, out, out=out)
+
+def html_table(df, fmt=None):
+    """
+    Small tables straight to <table> markup (no DataFrame.to_html pass).
+    Floats print with 4 decimals, NaN as blank; fmt maps a column to its own formatter.
+    """
+    fmt = fmt or {}
+    def cell(col, v):
+        if col in fmt:
+            return fmt[col](v)
+        if isinstance(v, (float, np.floating)):
+            return "" if np.isnan(v) else f"{v:.4f}"
+        return htmllib.escape(str(v))
+    cols = list(df.columns)
+    head = "".join(f"<th>{htmllib.escape(str(c))}</th>" for c in cols)
+    body = "".join("<tr>" + "".join(f"<td>{cell(c, v)}</td>" for c, v in zip(cols, row)) + "</tr>"
+                   for row in df.itertuples(index=False, name=None))
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
 
 def derive_season_from_date(df, date_col="date"):
     d = pd.to_datetime(df[date_col], errors="coerce")
+    if d.dt.tz is not None:
+        d = d.dt.tz_localize(None)
+    d = d.to_numpy()
     # NFL season “year” starts in August: Aug–Dec -> same year; Jan–Jul -> previous year
-    yr = d.dt.year
-    mon = d.dt.month
-    season = np.where(mon >= 8, yr, yr - 1)
+    # Months since 1970 give year and month in one integer pass: month index 7 is August
+    m = d.astype("datetime64[M]").astype(np.int64)
+    season = 1970 + m // 12 - (m % 12 < 7)
+    nat = np.isnat(d)
+    if nat.any():
+        season = np.where(nat, np.nan, season)
     return pd.Series(season, index=df.index)
 
 def main():
@@ -41,27 +75,29 @@ def main():
         df["season"] = derive_season_from_date(df, "date")
         print("[INFO] Derived 'season' from 'date' (NFL Aug→Dec = same year; Jan→Jul = previous year).")
 
-    # outcome + metrics
-    y = (df["home_score"].astype(float) > df["away_score"].astype(float)).astype(int)
-    p = df["exp_home"].astype(float)
+    # outcome + metrics as ndarrays; df_out is just the 8 output columns (no copy of df)
+    y = (df["home_score"].to_numpy(dtype=float) > df["away_score"].to_numpy(dtype=float)).astype(np.int8)
+    p = df["exp_home"].to_numpy(dtype=float)
+    brier = brier_vec(p, y)
+    ll = logloss_vec(p, y)
 
-    df_out = df.copy()
-    df_out["y_homewin"] = y
-    df_out["prob_home"] = p
-    df_out["brier"] = (p - y)**2
-    df_out["logloss"] = logloss_vec(p, y)
+    df_out = pd.DataFrame({
+        "date": df["date"], "season": df["season"],
+        "away_team": df["away_team"], "home_team": df["home_team"],
+        "prob_home": p, "y_homewin": y, "brier": brier, "logloss": ll,
+    }, copy=False)
 
     outdir = pathlib.Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
 
     details_csv = outdir / "backtest_details.csv"
-    cols = ["date","season","away_team","home_team","prob_home","y_homewin","brier","logloss"]
-    df_out[cols].to_csv(details_csv, index=False)
+    df_out.to_csv(details_csv, index=False)
 
+    valid = ~np.isnan(ll)
     overall = pd.DataFrame({
         "games":[len(df_out)],
-        "brier":[df_out["brier"].mean()],
-        "logloss":[df_out["logloss"].mean()]
+        "brier":[brier[valid].mean() if valid.any() else np.nan],
+        "logloss":[ll[valid].mean() if valid.any() else np.nan]
     })
     by_season = (df_out
                  .groupby("season", as_index=False)
@@ -97,12 +133,12 @@ def main():
         f"<div class='card'><div class='muted'>Log Loss (overall)</div><div class='mono'>{overall['logloss'].iloc[0]:.4f}</div></div>",
         "</div>",
         "<h2>By Season</h2>",
-        by_season.rename(columns={"season":"Season","games":"Games","brier":"Brier","logloss":"Log Loss"}).to_html(index=False),
+        html_table(by_season.rename(columns={"season":"Season","games":"Games","brier":"Brier","logloss":"Log Loss"}),
+                   fmt={"Season": lambda v: f"{v:g}" if isinstance(v, (float, np.floating)) else htmllib.escape(str(v))}),
         "<h2>Sample (last 20)</h2>",
-        df_out[["date","away_team","home_team","prob_home","y_homewin","brier","logloss"]]
-            .tail(20)
-            .rename(columns={"prob_home":"P(Home)","y_homewin":"Home Win"})
-            .to_html(index=False),
+        html_table(df_out[["date","away_team","home_team","prob_home","y_homewin","brier","logloss"]]
+                   .tail(20)
+                   .rename(columns={"prob_home":"P(Home)","y_homewin":"Home Win"})),
         "</body></html>"
     ]
     (outdir / "backtest_report.html").write_text("\n".join(html), encoding="utf-8")
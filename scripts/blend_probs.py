@@ -8,6 +8,8 @@ Usage:
 """
 import argparse, os, pandas as pd
 
+from _table_io import read_table, write_table
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--pred_in", default="out/predictions_with_elo_cal.csv")
@@ -15,14 +17,14 @@ def main():
     ap.add_argument("--out", default="out/blended_predictions.csv")
     args = ap.parse_args()
 
-    df = pd.read_csv(args.pred_in)
+    df = read_table(args.pred_in)
     need = ["home_win_prob","elo_logit_prob"]
     for c in need:
         if c not in df.columns:
             raise SystemExit(f"Missing column: {c}")
     a = args.alpha
     df["home_win_prob_blend"] = a*df["home_win_prob"] + (1-a)*df["elo_logit_prob"]
-    df.to_csv(args.out, index=False)
+    write_table(df, args.out)
     print(f"Wrote {args.out} (alpha={a})")
 if __name__ == "__main__":
     main()
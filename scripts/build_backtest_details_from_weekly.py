@@ -1,15 +1,17 @@
 #!/usr/bin/env python3
 # Build out/backtest_details.csv by merging weekly predictions (already fused) with history outcomes.
 # Predictions CSV MUST have: home_team, away_team, date, home_win_prob.
-# Join order: date+teams → teams+nearest_date(≤1d) → week-bounded (same season) → teams-only (same season).
+# Join order: date+teams / teams+nearest_date(≤1d) (one merge_asof) → week-bounded (same season) → teams-only (same season).
 # Cross-season matches are DISALLOWED.
 
 import os, sys, json, argparse
 from typing import Optional, List
+import numpy as np
 import pandas as pd
 
 OUT_DIR = "out"
 OUT_FILE = os.path.join(OUT_DIR, "backtest_details.csv")
+TEAM_LOOKUP = "teams_lookup.json"
 
 HOME_ALIASES = ["home_team","home","Home","home_name","home_abbr","team_home","homeTeam","home_code"]
 AWAY_ALIASES = ["away_team","away","Away","away_name","away_abbr","team_away","awayTeam","away_code"]
@@ -27,7 +29,7 @@ def read_json(path):
     except Exception: return None
 
 def read_teams_lookup() -> dict:
-    m = read_json("teams_lookup.json") or {}
+    m = read_json(TEAM_LOOKUP) or {}
     return {str(k).strip().upper(): str(v).strip().upper() for k,v in m.items()}
 
 def norm_team(s, table):
@@ -38,8 +40,30 @@ def norm_team(s, table):
 def pick_col(df: pd.DataFrame, aliases: List[str]) -> Optional[str]:
     return next((c for c in aliases if c in df.columns), None)
 
+def _parse_date(x):
+    try:
+        t = pd.Timestamp(x)
+    except Exception:
+        return pd.NaT
+    return t.tz_localize(None) if t.tzinfo is not None else t
+
+def parse_dates(s):
+    # plain YYYY-MM-DD values parse in one formatted pass; anything else (timestamps,
+    # UTC offsets) falls back to a per-value parse with the timezone dropped
+    d = pd.to_datetime(s, format="%Y-%m-%d", errors="coerce")
+    if d.dt.tz is not None:
+        d = d.dt.tz_localize(None)
+    miss = d.isna() & s.notna()
+    if miss.any():
+        d[miss] = s[miss].map(_parse_date)
+    return d
+
+def to_naive_day(s: pd.Series) -> pd.Series:
+    # datetime64 midnight (tz dropped), not an object column of datetime.date
+    return parse_dates(s).dt.normalize()
+
 def coerce_date_series(df: pd.DataFrame, col: str) -> None:
-    df[col] = pd.to_datetime(df[col], errors="coerce").dt.tz_localize(None).dt.date
+    df[col] = to_naive_day(df[col])
 
 def find_date_col(df: pd.DataFrame, aliases: List[str]) -> Optional[str]:
     for c in aliases:
@@ -51,37 +75,48 @@ def find_date_col(df: pd.DataFrame, aliases: List[str]) -> Optional[str]:
                 pass
     return None
 
+def as_numeric(s: pd.Series) -> pd.Series:
+    # numeric columns pass through; only object/string columns take pd.to_numeric's coercion path
+    return s if pd.api.types.is_numeric_dtype(s) else pd.to_numeric(s, errors="coerce")
+
 def ensure_label(dfh: pd.DataFrame) -> str:
     lbl = pick_col(dfh, LABEL_ALIASES)
     if lbl: return lbl
     h = pick_col(dfh, SCORE_HOME); a = pick_col(dfh, SCORE_AWAY)
     if not h or not a:
         sys.exit("History has neither a label column nor scores to derive it.")
-    dfh["home_win"] = (pd.to_numeric(dfh[h], errors="coerce") > pd.to_numeric(dfh[a], errors="coerce")).astype("Int64")
+    hs = as_numeric(dfh[h]).to_numpy(dtype=float)
+    as_ = as_numeric(dfh[a]).to_numpy(dtype=float)
+    dfh["home_win"] = pd.array((hs > as_).astype("int8"), dtype="Int64")
     return "home_win"
 
 def nfl_season_year(d: pd.Series) -> pd.Series:
     # NFL: Aug–Dec -> same year; Jan–Feb -> previous season year
     dt = pd.to_datetime(d, errors="coerce")
-    m = dt.dt.month
-    y = dt.dt.year
-    return (y.where(m >= 8, y - 1)).astype("Int64")
-
-def nearest_date_join(preds: pd.DataFrame, dfh: pd.DataFrame, hist_date_col: str, max_days: int = 1) -> pd.DataFrame:
-    # Avoid name collisions by renaming history date to _hist_date before the join
-    h = dfh[["_home_norm","_away_norm",hist_date_col]].rename(columns={hist_date_col: "_hist_date"})
-    merged = preds.merge(h, on=["_home_norm","_away_norm"], how="inner")
-    if merged.empty:
-        return merged
-    merged["abs_diff_days"] = (pd.to_datetime(merged["date"]) - pd.to_datetime(merged["_hist_date"])).abs().dt.days
-    merged = merged[merged["abs_diff_days"] <= max_days]
-    if merged.empty:
-        return merged
-    merged["_k"] = merged["_home_norm"] + "|" + merged["_away_norm"] + "|" + merged["date"].astype(str)
-    merged = merged.sort_values(["_k","abs_diff_days"]).groupby("_k", as_index=False).first()
-    # bring all history columns back via exact key
-    final = merged.merge(dfh, left_on=["_home_norm","_away_norm","_hist_date"], right_on=["_home_norm","_away_norm",hist_date_col], how="left")
-    return final
+    if dt.dt.tz is not None:
+        dt = dt.dt.tz_localize(None)
+    dt = dt.to_numpy()
+    # months since 1970 give year and month in one integer pass (month index 7 is August)
+    m = dt.astype("datetime64[M]").astype(np.int64)
+    season = 1970 + m // 12 - (m % 12 < 7)
+    return pd.Series(pd.arrays.IntegerArray(season, np.isnat(dt)), index=d.index)
+
+def date_teams_asof(preds: pd.DataFrame, dfh: pd.DataFrame, hist_date_col: str, label_col: str, max_days: int = 1) -> pd.DataFrame:
+    """
+    One merge_asof by (_home_norm, _away_norm): each prediction takes the history game whose date
+    is nearest to its own, within max_days (exact dates win). Unmatched predictions are dropped;
+    rows keep the predictions' order. Adds abs_diff_days.
+    """
+    left = preds.assign(_row=range(len(preds)), _d=preds["date"])
+    left = left[left["_d"].notna()].sort_values("_d", kind="stable")
+    right = dfh[["_home_norm","_away_norm",hist_date_col,label_col]].rename(columns={hist_date_col: "_hist_date"})
+    right = right.assign(_hd=right["_hist_date"])
+    right = right[right["_hd"].notna()].sort_values("_hd", kind="stable")
+    merged = pd.merge_asof(left, right, left_on="_d", right_on="_hd", by=["_home_norm","_away_norm"],
+                           direction="nearest", tolerance=pd.Timedelta(days=max_days))
+    merged = merged[merged["_hd"].notna()].sort_values("_row")
+    merged["abs_diff_days"] = (merged["_d"] - merged["_hd"]).abs().dt.days
+    return merged.drop(columns=["_row","_d","_hd"]).reset_index(drop=True)
 
 def main():
     ap = argparse.ArgumentParser()
@@ -99,8 +134,6 @@ def main():
     for col in ["home_team","away_team","date","home_win_prob"]:
         if col not in dfp.columns:
             sys.exit(f"Predictions missing required column: {col}")
-    dfp["_home_norm"] = dfp["home_team"].map(lambda s: norm_team(s, team_map))
-    dfp["_away_norm"] = dfp["away_team"].map(lambda s: norm_team(s, team_map))
     coerce_date_series(dfp, "date")
     dfp["_season"] = nfl_season_year(dfp["date"])
     pred_seasons = sorted(dfp["_season"].dropna().unique().tolist())
@@ -112,8 +145,17 @@ def main():
     home_h = pick_col(dfh, HOME_ALIASES); away_h = pick_col(dfh, AWAY_ALIASES)
     if not home_h or not away_h:
         sys.exit(f"History file missing home/away columns: {args.hist}")
-    dfh["_home_norm"] = dfh[home_h].map(lambda s: norm_team(s, team_map))
-    dfh["_away_norm"] = dfh[away_h].map(lambda s: norm_team(s, team_map))
+    # Normalize teams once per distinct name, into one shared categorical
+    # dtype so every join below keys on integer codes, not strings
+    raw = {"p_home": dfp["home_team"].astype(str), "p_away": dfp["away_team"].astype(str),
+           "h_home": dfh[home_h].astype(str), "h_away": dfh[away_h].astype(str)}
+    names = pd.unique(pd.concat(raw.values(), ignore_index=True))
+    team_norm = {r: norm_team(r, team_map) for r in names}
+    cats = pd.CategoricalDtype(sorted(set(team_norm[r] for r in names)))
+    dfp["_home_norm"] = raw["p_home"].map(team_norm).astype(cats)
+    dfp["_away_norm"] = raw["p_away"].map(team_norm).astype(cats)
+    dfh["_home_norm"] = raw["h_home"].map(team_norm).astype(cats)
+    dfh["_away_norm"] = raw["h_away"].map(team_norm).astype(cats)
     hist_date = find_date_col(dfh, DATE_ALIASES_HIST)
     if not hist_date:
         sys.exit(f"History '{args.hist}' has no usable date column (looked for {DATE_ALIASES_HIST}).")
@@ -129,30 +171,19 @@ def main():
     label_col = ensure_label(dfh_season)
     merged = None; merge_name = None
 
-    # 1) Strict date+teams
+    # 1+2) Teams + date: exact date, else nearest date (<=1 day), in one merge_asof
     if args.strategy in ("strict","date_then_fallback"):
-        m = dfp.merge(
-            dfh_season,
-            left_on=["date","_home_norm","_away_norm"],
-            right_on=[hist_date,"_home_norm","_away_norm"],
-            how="inner",
-            suffixes=("_pred","_hist")
-        )
+        m = date_teams_asof(dfp, dfh_season, hist_date, label_col, max_days=1)
         if not m.empty:
-            merged = m; merge_name = "date+teams"
-
-    # 2) Teams + nearest date (≤1 day)
-    if merged is None and args.strategy in ("strict","date_then_fallback"):
-        m2 = nearest_date_join(dfp, dfh_season, hist_date, max_days=1)
-        if not m2.empty:
-            merged = m2; merge_name = "teams+nearest_date_<=1day"
+            merged = m
+            merge_name = "date+teams" if (m["abs_diff_days"] == 0).all() else "teams+nearest_date_<=1day"
 
     # 3) Week-bounded teams-only (same season) via week_info.json
     if merged is None and args.strategy in ("date_then_fallback",):
         wi = read_json("week_info.json")
         if wi and ("week_start" in wi and "week_end" in wi):
-            ws = pd.to_datetime(wi["week_start"]).date()
-            we = pd.to_datetime(wi["week_end"]).date()
+            ws = pd.Timestamp(wi["week_start"]).tz_localize(None).normalize()
+            we = pd.Timestamp(wi["week_end"]).tz_localize(None).normalize()
             dfh_week = dfh_season.loc[(dfh_season[hist_date] >= ws) & (dfh_season[hist_date] <= we)].copy()
             m3 = dfp.merge(dfh_week, on=["_home_norm","_away_norm"], how="inner", suffixes=("_pred","_hist"))
             if not m3.empty:
@@ -171,9 +202,9 @@ def main():
     out = pd.DataFrame()
     out["home_team"] = merged["_home_norm"]
     out["away_team"] = merged["_away_norm"]
-    out["date"] = pd.to_datetime(merged["date"]).dt.date
-    out["home_win_prob"] = pd.to_numeric(merged["home_win_prob"], errors="coerce")
-    out["home_win"] = pd.to_numeric(merged[label_col], errors="coerce").astype("Int64")
+    out["date"] = merged["date"]
+    out["home_win_prob"] = as_numeric(merged["home_win_prob"])
+    out["home_win"] = as_numeric(merged[label_col]).astype("Int64")
     out = out[(out["home_win"].isin([0,1])) & out["home_win_prob"].notna()]
     if out.empty:
         sys.exit(f"Merged ({merge_name}) but no usable rows.")
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import os, sys, json, math, csv
+import os, sys, json
+from collections import defaultdict
 from pathlib import Path
+import numpy as np
+import pandas as pd
+from scipy.special import expit, logit as sp_logit
 
 # Required inputs
 WK = Path("out/week_with_market.csv")          # date,week,away_team,home_team,msf_game_id,book,vegas_line_home,vegas_total
@@ -18,124 +22,117 @@ for p in [WK, PR, CAL]:
 cal = json.load(CAL.open())
 a, b = float(cal["a"]), float(cal["b"])
 
-def logit(p: float) -> float:
-    p = min(max(p, 1e-12), 1-1e-12)
-    return math.log(p/(1-p))
+def logit(p):
+    return sp_logit(np.clip(p, 1e-12, 1-1e-12))
 
-def prob_from_line(line_home: float) -> float:
-    return 1.0/(1.0+math.exp(-(a + b*line_home)))
+def prob_from_line(line_home):
+    return expit(a + b*line_home)
 
-def line_from_prob(p_home: float) -> float:
+def line_from_prob(p_home):
     return (logit(p_home) - a)/b
 
+def read_str_csv(path: Path, num_cols=()) -> pd.DataFrame:
+    # every cell as the raw string (blank stays ""), as csv.DictReader would give it;
+    # num_cols are parsed to float64 by the C parser, with blank/"nan" read as NaN
+    return pd.read_csv(path, dtype=defaultdict(lambda: str, {c: "float64" for c in num_cols}),
+                       keep_default_na=False, na_values={c: ["", "nan", "NaN"] for c in num_cols})
+
+def col(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name] if name in df.columns else pd.Series("", index=df.index)
+
+def first_nonblank(df: pd.DataFrame, names) -> pd.Series:
+    # per row, the first of `names` whose cell is not blank ("" when none is)
+    out = pd.Series("", index=df.index)
+    for name in reversed(names):
+        v = col(df, name)
+        out = v.where(v != "", out)
+    return out
+
 # Load injuries (optional)
-inj_map = {}
+inj_pts = pd.Series(dtype=float)   # team -> points, mapped onto the board in bulk
 if INJ.exists():
-    with INJ.open(newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            team = (row.get("team") or "").strip()
-            pts  = row.get("points_capped") or row.get("points") or "0"
-            try: inj_map[team] = float(pts)
-            except: inj_map[team] = 0.0
+    inj = read_str_csv(INJ)
+    pts = pd.to_numeric(first_nonblank(inj, ["points_capped","points"]).replace("", "0"), errors="coerce").fillna(0.0)
+    inj_pts = pd.Series(pts.to_numpy(dtype=float), index=col(inj, "team").str.strip())
+    # later rows win for a repeated team (map needs a unique index)
+    inj_pts = inj_pts[~inj_pts.index.duplicated(keep="last")]
 
 # Read week_with_market
-with WK.open(newline="", encoding="utf-8") as f:
-    wk = list(csv.DictReader(f))
-    needed = ["date","week","away_team","home_team","msf_game_id","book","vegas_line_home","vegas_total"]
-    miss = [c for c in needed if c not in wk[0].keys()]
-    if miss: fatal(f"week_with_market.csv missing columns: {miss}")
+MARKET_NUM = ["vegas_line_home","vegas_total"]
+wk = read_str_csv(WK, num_cols=MARKET_NUM)
+needed = ["date","week","away_team","home_team","msf_game_id","book","vegas_line_home","vegas_total"]
+miss = [c for c in needed if c not in wk.columns]
+if miss: fatal(f"week_with_market.csv missing columns: {miss}")
+wk = wk.fillna({c: 0.0 for c in MARKET_NUM})
 
 # Read preds
-with PR.open(newline="", encoding="utf-8") as f:
-    pr = list(csv.DictReader(f))
-
-# Index preds by game
-def pick_prob(row: dict) -> float | None:
-    for k in ["p_home","p_home_cal_platt","p_home_cal_iso","home_win_prob","cal_platt","elo_exp_home"]:
-        if k in row and row[k] not in (None,"","nan"):
-            try:
-                return float(row[k])
-            except:
-                pass
-    return None
-
-pred_by_id = {}
-for row in pr:
-    gid = (row.get("msf_game_id") or row.get("game_id") or "").strip()
-    if not gid:
-        continue
-    p = pick_prob(row)
-    if p is not None:
-        pred_by_id[gid] = p
+pr = read_str_csv(PR)
+
+# Index preds by game: first parseable prob column per row, last row per game id wins
+PROB_COLS = ["p_home","p_home_cal_platt","p_home_cal_iso","home_win_prob","cal_platt","elo_exp_home"]
+probs = pd.DataFrame({k: pd.to_numeric(pr[k].where(pr[k] != "nan"), errors="coerce")
+                      for k in PROB_COLS if k in pr.columns}, index=pr.index)
+pred = pd.DataFrame({"msf_game_id": first_nonblank(pr, ["msf_game_id","game_id"]).str.strip(),
+                     "p_model": probs.bfill(axis=1).iloc[:, 0] if len(probs.columns) else np.nan})
+pred = pred[(pred["msf_game_id"] != "") & pred["p_model"].notna()].drop_duplicates("msf_game_id", keep="last")
 
 # Build final board rows
-rows = []
-missing_pred = 0
-for row in wk:
-    gid = row["msf_game_id"].strip()
-    if not gid:
-        continue
-
-    vegas_line = float(row["vegas_line_home"]) if row["vegas_line_home"] not in ("","nan") else 0.0
-    vegas_total = float(row["vegas_total"]) if row["vegas_total"] not in ("","nan") else 0.0
-    book = row.get("book","").strip()
-
-    p_model = pred_by_id.get(gid, None)
-    if p_model is None:
-        missing_pred += 1
-        continue
-
-    # Market prob from spread
-    p_market = prob_from_line(vegas_line)
-
-    # Model line from prob + injury net (Away - Home)
-    base_model_line = line_from_prob(p_model)
-    inj_home = inj_map.get(row["home_team"].strip(), 0.0)
-    inj_away = inj_map.get(row["away_team"].strip(), 0.0)
-    inj_net  = inj_away - inj_home
-    model_line = base_model_line + inj_net
-
-    # Edge & confidence
-    edge_pts = model_line - vegas_line
-    confidence = abs(p_model - p_market)
-
-    rows.append({
-        "date": row["date"],
-        "week": row["week"],
-        "away_team": row["away_team"],
-        "home_team": row["home_team"],
-        "msf_game_id": gid,
-        "book": book,
-        "vegas_line_home": f"{vegas_line:.1f}",
-        "vegas_total": f"{vegas_total:.1f}",
-        "model_line_home": f"{model_line:.2f}",
-        "edge": f"{edge_pts:.2f}",
-        "confidence": f"{confidence:.4f}",
-        "p_home_market": f"{p_market:.6f}",
-        "p_home_model": f"{p_model:.6f}",
-        "inj_home_pts": f"{inj_home:.2f}",
-        "inj_away_pts": f"{inj_away:.2f}",
-        "inj_net_pts":  f"{inj_net:.2f}",
-    })
-
-if not rows:
+wk = wk.assign(msf_game_id=wk["msf_game_id"].str.strip())
+wk = wk[wk["msf_game_id"] != ""]
+board = wk.merge(pred, on="msf_game_id", how="left")
+missing_pred = int(board["p_model"].isna().sum())
+board = board[board["p_model"].notna()].reset_index(drop=True)
+
+if board.empty:
     fatal("No board rows built (likely no matching msf_game_id between preds and week_with_market).")
 
+vegas_line = board["vegas_line_home"].to_numpy(dtype=float)
+vegas_total = board["vegas_total"].to_numpy(dtype=float)
+p_model = board["p_model"].to_numpy(dtype=float)
+
+# Market prob from spread
+p_market = prob_from_line(vegas_line)
+
+# Model line from prob + injury net (Away - Home)
+base_model_line = line_from_prob(p_model)
+inj_home = board["home_team"].str.strip().map(inj_pts).fillna(0.0).to_numpy(dtype=float)
+inj_away = board["away_team"].str.strip().map(inj_pts).fillna(0.0).to_numpy(dtype=float)
+inj_net  = inj_away - inj_home
+model_line = base_model_line + inj_net
+
+# Edge & confidence
+edge_pts = model_line - vegas_line
+confidence = np.abs(p_model - p_market)
+
+def fmt(x: np.ndarray, spec: str) -> pd.Series:
+    # columns carry different precisions, which to_csv(float_format=...) cannot express,
+    # so each is pre-formatted once and to_csv only writes strings
+    return pd.Series(x).map(spec.format)
+
+out = pd.DataFrame({
+    "date": board["date"],
+    "week": board["week"],
+    "away_team": board["away_team"],
+    "home_team": board["home_team"],
+    "msf_game_id": board["msf_game_id"],
+    "book": board["book"].str.strip(),
+    "vegas_line_home": fmt(vegas_line, "{:.1f}"),
+    "vegas_total": fmt(vegas_total, "{:.1f}"),
+    "model_line_home": fmt(model_line, "{:.2f}"),
+    "edge": fmt(edge_pts, "{:.2f}"),
+    "confidence": fmt(confidence, "{:.4f}"),
+    "p_home_market": fmt(p_market, "{:.6f}"),
+    "p_home_model": fmt(p_model, "{:.6f}"),
+    "inj_home_pts": fmt(inj_home, "{:.2f}"),
+    "inj_away_pts": fmt(inj_away, "{:.2f}"),
+    "inj_net_pts":  fmt(inj_net, "{:.2f}"),
+})
+
 # Deterministic sort
-rows.sort(key=lambda r: (r["date"], r["home_team"], r["away_team"]))
+out = out.sort_values(["date","home_team","away_team"], kind="stable")
 
-# Write locked schema
+# Write locked schema (csv-module dialect: minimal quoting, CRLF rows)
 OUT.parent.mkdir(parents=True, exist_ok=True)
-cols = [
- "date","week","away_team","home_team","msf_game_id","book",
- "vegas_line_home","vegas_total",
- "model_line_home","edge","confidence",
- "p_home_market","p_home_model",
- "inj_home_pts","inj_away_pts","inj_net_pts"
-]
-with OUT.open("w", newline="", encoding="utf-8") as f:
-    w = csv.DictWriter(f, fieldnames=cols); w.writeheader()
-    w.writerows(rows)
-
-print(f"[OK] wrote {OUT} rows={len(rows)}  missing_preds={missing_pred}")
+out.to_csv(OUT, index=False, lineterminator="\r\n")
+
+print(f"[OK] wrote {OUT} rows={len(out)}  missing_preds={missing_pred}")
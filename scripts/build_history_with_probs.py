@@ -4,15 +4,27 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 import glob
+import json
+import os
+
+from joblib import Parallel, delayed
 
 ROOT = Path(__file__).resolve().parents[1]
 
 HIST_GLOB = str(ROOT / "history" / "season_*_from_site.csv")
 RATINGS_BY_DATE_CSV = ROOT / "out" / "elo_ratings_by_date.csv"
+# normalized (sorted, renamed) ratings; not a _table_io twin, since the columns differ from the CSV.
+# One file per RATINGS_NORM_VERSION: bump it whenever load_ratings_by_date's normalization changes
+RATINGS_NORM_VERSION = 1
+RATINGS_NORM_PARQUET = RATINGS_BY_DATE_CSV.with_name(f"elo_ratings_by_date.norm_v{RATINGS_NORM_VERSION}.parquet")
+# enriched seasons cached as Parquet + .key.json sidecar (git-ignored); bump ENRICH_VERSION
+# whenever enrich_file, elo_prob or safe_asof_lookup change what they produce
+ENRICH_CACHE_DIR = ROOT / "cache" / "enriched"
+ENRICH_VERSION = 1
 
 # --------- Elo utilities (self-contained) ----------
-def elo_prob(r_home: float, r_away: float) -> float:
-    """Standard Elo to win prob (home vs away)."""
+def elo_prob(r_home, r_away):
+    """Standard Elo to win prob (home vs away); scalars or float arrays."""
     return 1.0 / (1.0 + 10.0 ** ((r_away - r_home) / 400.0))
 
 # --------- Ratings index helpers ----------
@@ -20,7 +32,18 @@ def load_ratings_by_date() -> pd.DataFrame:
     """
     Expect a CSV with columns: date, team, elo
     Ensure date is datetime and table is stably sorted by ['team','date'].
+    The normalized frame is cached as Parquet (per RATINGS_NORM_VERSION) and reused while it is
+    at least as new as the CSV.
     """
+    pq = RATINGS_NORM_PARQUET
+    if pq.exists() and pq.stat().st_mtime_ns >= RATINGS_BY_DATE_CSV.stat().st_mtime_ns:
+        try:
+            df = pd.read_parquet(pq)
+            # same string dtype as the CSV path, so merge_asof's by-keys still match
+            df["_team"] = df["_team"].astype(str)
+            return df
+        except Exception:
+            pass  # unreadable cache -> rebuild from the CSV
     df = pd.read_csv(RATINGS_BY_DATE_CSV)
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
     df = df.dropna(subset=["date", "team", "elo"]).copy()
@@ -28,55 +51,50 @@ def load_ratings_by_date() -> pd.DataFrame:
     # stable sort for merge_asof(by=...)
     df = df.sort_values(["team", "date"], kind="mergesort").reset_index(drop=True)
     # rename to internal keys
-    return df.rename(columns={"team": "_team", "elo": "_elo"})
+    df = df.rename(columns={"team": "_team", "elo": "_elo"})
+    try:
+        df.to_parquet(pq, compression="snappy", index=False)
+    except Exception as e:
+        pq.unlink(missing_ok=True)
+        print(f"[WARN] ratings cache not written: {e}")
+    return df
 
 def safe_asof_lookup(left_df: pd.DataFrame, ratings_idx: pd.DataFrame, team_col: str) -> pd.Series:
     """
-    Robust per-team asof lookup that guarantees sort order for both sides.
+    As-of lookup of each row's latest team Elo on/before its date (NaN if none),
+    returned in left_df's row order.
+
+    Each team's ratings are a contiguous, date-sorted block of ratings_idx, so the lookup
+    is one np.searchsorted(side='right') per team over that block; ties on a date resolve
+    to the last rating, as merge_asof(direction='backward') would.
 
     left_df: columns ['date', team_col]
     ratings_idx: columns ['_team','date','_elo'] pre-sorted by ['_team','date']
     """
-    import pandas as _pd
-
     if "date" not in left_df.columns or team_col not in left_df.columns:
         raise ValueError("safe_asof_lookup requires ['date', team_col] in left_df")
 
-    # Normalize left
-    left = left_df.copy()
-    left["date"] = _pd.to_datetime(left["date"], errors="coerce")
-    left["_team"] = left[team_col].astype(str).str.upper().str.strip()
-    left["_ix_orig"] = range(len(left))
-
-    # Container for pieces
-    out_parts = []
-
-    # Iterate teams to avoid grouped-asof sorting traps
-    for t, sub in left.groupby("_team", sort=False):
-        sub = sub.sort_values("date", kind="mergesort").copy()
-
-        rsub = ratings_idx[ratings_idx["_team"] == t]
-        if not len(rsub):
-            # No ratings for team — emit NaNs to be filled by caller
-            tmp = sub[["_ix_orig"]].copy()
-            tmp["_elo"] = _pd.NA
-            out_parts.append(tmp)
-            continue
-
-        rsub = rsub.sort_values("date", kind="mergesort")
+    r_team = ratings_idx["_team"].to_numpy()
+    r_date = ratings_idx["date"].to_numpy(dtype="datetime64[ns]")
+    r_elo = ratings_idx["_elo"].to_numpy(dtype=float)
+    starts = np.flatnonzero(np.r_[True, r_team[1:] != r_team[:-1]]) if len(r_team) else np.empty(0, dtype=int)
+    ends = np.append(starts[1:], len(r_team))
 
-        merged = _pd.merge_asof(
-            sub[["date","_ix_orig"]],
-            rsub[["date","_elo"]],
-            on="date",
-            direction="backward",
-            allow_exact_matches=True,
-        )
-        out_parts.append(merged[["_ix_orig","_elo"]])
-
-    out = _pd.concat(out_parts, ignore_index=True)
-    out = out.sort_values("_ix_orig").reset_index(drop=True)
-    return out["_elo"]
+    # Normalize left
+    q_date = pd.to_datetime(left_df["date"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+    q_team = left_df[team_col].astype(str).str.upper().str.strip()
+    code = pd.Index(r_team[starts]).get_indexer(q_team)
+
+    out = np.full(len(left_df), np.nan)
+    rows = np.flatnonzero((code >= 0) & ~np.isnat(q_date))
+    if rows.size:
+        rows = rows[np.argsort(code[rows], kind="stable")]
+        for blk in np.split(rows, np.flatnonzero(np.diff(code[rows])) + 1):
+            s, e = starts[code[blk[0]]], ends[code[blk[0]]]
+            pos = np.searchsorted(r_date[s:e], q_date[blk], side="right") - 1
+            hit = pos >= 0
+            out[blk[hit]] = r_elo[s:e][pos[hit]]
+    return pd.Series(out, name="_elo")
 
 def enrich_file(path_csv: str, ratings_idx: pd.DataFrame) -> pd.DataFrame:
     """
@@ -104,14 +122,10 @@ def enrich_file(path_csv: str, ratings_idx: pd.DataFrame) -> pd.DataFrame:
     except Exception as e:
         raise RuntimeError(f"{path_csv}: Elo lookup failed: {e}")
 
-    # Compute probabilities
-    p = []
-    # fallback Elo if missing
-    elo_home = elo_home.fillna(1500.0)
-    elo_away = elo_away.fillna(1500.0)
-    for rh, ra in zip(elo_home.values, elo_away.values):
-        p.append(elo_prob(rh, ra))
-    df["p"] = p
+    # Compute probabilities (one array expression; fallback Elo if missing)
+    elo_home = elo_home.fillna(1500.0).to_numpy(dtype=float)
+    elo_away = elo_away.fillna(1500.0).to_numpy(dtype=float)
+    df["p"] = elo_prob(elo_home, elo_away)
 
     # Compute labels
     y = None
@@ -137,6 +151,53 @@ def enrich_file(path_csv: str, ratings_idx: pd.DataFrame) -> pd.DataFrame:
     out = df.assign(y=y)[["date", "home_team", "away_team", "p", "y"]]
     return out
 
+def _enrich_key(path_csv: str) -> dict:
+    # an enriched season is current while neither its source file, the ratings nor the code have changed
+    return {"version": ENRICH_VERSION,
+            "src_mtime_ns": os.stat(path_csv).st_mtime_ns,
+            "ratings_mtime_ns": os.stat(RATINGS_BY_DATE_CSV).st_mtime_ns}
+
+def _cache_paths(out_path: str):
+    stem = Path(out_path).stem
+    return ENRICH_CACHE_DIR / f"{stem}.parquet", ENRICH_CACHE_DIR / f"{stem}.key.json"
+
+def load_cached_enriched(path_csv: str, out_path: str):
+    """Previous enrich_file result (Parquet) if its sidecar key still matches, else None."""
+    pq, key = _cache_paths(out_path)
+    try:
+        if json.loads(key.read_text()) != _enrich_key(path_csv) or not Path(out_path).exists():
+            return None
+        return pd.read_parquet(pq)
+    except Exception:
+        return None
+
+def save_cached_enriched(df_en: pd.DataFrame, path_csv: str, out_path: str) -> None:
+    pq, key = _cache_paths(out_path)
+    key.unlink(missing_ok=True)
+    try:
+        ENRICH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df_en.to_parquet(pq, compression="zstd", index=False)
+        key.write_text(json.dumps(_enrich_key(path_csv)))
+    except Exception as e:
+        print(f"[WARN] {out_path}: enrich cache not written: {e}")
+
+def _enrich_and_write(path_csv: str, out_path: str, ratings_idx: pd.DataFrame):
+    """
+    enrich_file plus the per-season CSV and cache writes, run in a worker process.
+    Returns (df_en, None), or (None, warning) for a season that was skipped.
+    """
+    try:
+        df_en = enrich_file(path_csv, ratings_idx)
+    except pd.errors.EmptyDataError:
+        return None, f"[WARN] {path_csv}: empty file; skipping."
+    except Exception as e:
+        return None, f"[WARN] {path_csv}: could not enrich: {e}; skipping."
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    df_en.to_csv(out_path, index=False)
+    save_cached_enriched(df_en, path_csv, out_path)
+    return df_en, None
+
 def main():
     # Ratings by date must exist & be sorted
     if not RATINGS_BY_DATE_CSV.exists():
@@ -148,20 +209,29 @@ def main():
         print(f"[WARN] No history files matched {HIST_GLOB}")
         return
 
+    out_paths = {f: f.replace("season_", "enriched_") for f in files}
+    cached = {f: load_cached_enriched(f, out_paths[f]) for f in files}
+
+    # seasons are independent: enrich the stale ones across worker processes
+    todo = [f for f in files if cached[f] is None]
+    fresh = {}
+    if todo:
+        n_jobs = min(len(todo), os.cpu_count() or 1)
+        fresh = dict(zip(todo, Parallel(n_jobs=n_jobs, backend="loky")(
+            delayed(_enrich_and_write)(f, out_paths[f], ratings_idx) for f in todo
+        )))
+
     out_all = []
     for f in files:
-        try:
-            df_en = enrich_file(f, ratings_idx)
-        except pd.errors.EmptyDataError:
-            print(f"[WARN] {f}: empty file; skipping.")
+        out_path = out_paths[f]
+        if cached[f] is not None:
+            print(f"[OK] up to date {out_path} rows= {len(cached[f])}")
+            out_all.append(cached[f])
             continue
-        except Exception as e:
-            print(f"[WARN] {f}: could not enrich: {e}; skipping.")
+        df_en, warn = fresh[f]
+        if warn:
+            print(warn)
             continue
-
-        out_path = f.replace("season_", "enriched_")
-        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
-        df_en.to_csv(out_path, index=False)
         print(f"[OK] wrote {out_path} rows= {len(df_en)}")
         out_all.append(df_en)
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os, json, base64, io, datetime as dt
+from functools import lru_cache
 import pandas as pd
 
 # Inputs (non-destructive to modeling):
@@ -15,10 +16,34 @@ ART_DIR   = "artifacts"
 CARDS_DIR = os.path.join(ART_DIR, "game_cards")
 TABLE_OUT = os.path.join(ART_DIR, "week_table.csv")
 HTML_OUT  = os.path.join(ART_DIR, "weekly_report.html")
+# base64 of each embedded card, keyed by path and reused while the PNG's mtime is unchanged
+CARD_CACHE = os.path.join(ART_DIR, ".card_cache.json")
+# REPORT_LINK_CARDS=1 links cards as game_cards/<name>.png (small HTML, lazy-loaded)
+# instead of embedding them; the report then needs the game_cards/ folder next to it
+LINK_CARDS = os.environ.get("REPORT_LINK_CARDS") == "1"
 
 REQ_COLS  = ["home_team","away_team","date","home_win_prob"]
 OPT_COLS  = ["line","total"]
 
+REPORT_CSS = """\
+ body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; padding: 24px; background:#fff; color:#222; }
+ h1 { margin: 0 0 8px 0; font-size: 28px; }
+ .meta { color:#555; margin-bottom: 18px; font-size: 13px; }
+ table { border-collapse: collapse; width: 100%; font-size: 14px; }
+ th, td { padding: 10px 8px; text-align: left; border-bottom: 1px solid #eee; }
+ th { background: #fafafa; position: sticky; top: 0; z-index: 1; }
+ tbody tr:nth-child(odd)  { background: #fff; }
+ tbody tr:nth-child(even) { background: #fcfcfc; }
+ .grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(260px, 1fr)); gap: 14px; margin-top: 18px; }
+ .card { border: 1px solid #eee; border-radius: 12px; padding: 10px; background: #fff; box-shadow: 0 1px 2px rgba(0,0,0,0.03); }
+ .card img { width: 100%; height: auto; display:block; border-radius: 8px; }
+ .card.fallback .title { font-weight: 600; margin-bottom: 6px; }
+ .card.fallback .meta  { color:#666; font-size: 12px; margin-bottom: 8px; }
+ .card.fallback .row   { display:flex; justify-content: space-between; font-size: 13px; padding: 4px 0; border-top: 1px dashed #eee; }
+ .footer { color:#666; font-size: 12px; margin-top: 24px; }
+ .small  { color:#666; font-size: 12px; }
+"""
+
 def pick_source():
     for p in PREFS:
         if p and os.path.isfile(p):
@@ -33,12 +58,16 @@ def load_alpha_note():
         return None
 
 def fmt_prob(p):
+    if pd.isna(p):
+        return "—"
     try:
         return f"{float(p)*100:0.1f}%"
     except Exception:
         return "—"
 
 def fmt_line(v):
+    if pd.isna(v):
+        return "—"
     try:
         f = float(v)
         # show +/− with one decimal
@@ -47,6 +76,8 @@ def fmt_line(v):
         return "—"
 
 def fmt_total(v):
+    if pd.isna(v):
+        return "—"
     try:
         f = float(v)
         return f"{f:0.1f}"
@@ -89,16 +120,60 @@ def find_card_for_row(r):
     p = os.path.join(CARDS_DIR, cand)
     return p if os.path.isfile(p) else None
 
-def b64_img(path):
+_card_cache = None
+_card_cache_dirty = False
+
+def load_card_cache():
+    global _card_cache
+    if _card_cache is None:
+        try:
+            with open(CARD_CACHE, "r", encoding="utf-8") as f:
+                _card_cache = json.load(f)
+        except Exception:
+            _card_cache = {}
+    return _card_cache
+
+def save_card_cache():
+    global _card_cache_dirty
+    if not _card_cache_dirty:
+        return
+    # drop cards that no longer exist so the sidecar does not grow forever
+    cache = {p: v for p, v in load_card_cache().items() if os.path.isfile(p)}
+    os.makedirs(ART_DIR, exist_ok=True)
+    tmp = CARD_CACHE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, CARD_CACHE)
+    _card_cache_dirty = False
+
+@lru_cache(maxsize=None)
+def _b64(path, mtime_ns):
+    global _card_cache_dirty
+    cache = load_card_cache()
+    hit = cache.get(path)
+    if hit and hit.get("mtime") == mtime_ns:
+        return hit["b64"]
     with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode("ascii")
+        enc = base64.b64encode(f.read()).decode("ascii")
+    cache[path] = {"mtime": mtime_ns, "b64": enc}
+    _card_cache_dirty = True
+    return enc
+
+def b64_img(path):
+    return _b64(path, os.stat(path).st_mtime_ns)
+
+def card_img_src(path):
+    if LINK_CARDS:
+        return os.path.relpath(path, os.path.dirname(HTML_OUT)).replace(os.sep, "/")
+    return f"data:image/png;base64,{b64_img(path)}"
 
 def build_cards_section(df):
     cards_html = []
-    for _, r in df.iterrows():
+    for r in df.to_dict("records"):
         p = find_card_for_row(r)
         if p:
-            cards_html.append(f'<div class="card"><img src="data:image/png;base64,{b64_img(p)}" alt="game card" /></div>')
+            lazy = ' loading="lazy"' if LINK_CARDS else ""
+            cards_html.append(f'<div class="card"><img src="{card_img_src(p)}"{lazy} alt="game card" /></div>')
         else:
             # graceful fallback mini-card
             line = fmt_line(r.get("line"))
@@ -112,26 +187,23 @@ def build_cards_section(df):
                        <div class="row"><span>Total</span><span>{total}</span></div>
                     </div>'''
             )
+    save_card_cache()
     return "\n".join(cards_html)
 
 def build_table_section(df):
-    # build HTML table with alternating row shading, graceful “—” for missing
-    head = "<tr><th>Date</th><th>Away</th><th>Home</th><th>P(Home)</th><th>Line</th><th>Total</th></tr>"
-    rows = []
-    for i, r in df.iterrows():
-        cls = "odd" if (i % 2) else "even"
-        date_str = r["date"].strftime("%Y-%m-%d") if pd.notna(r["date"]) else "—"
-        rows.append(
-            f"<tr class='{cls}'>"
-            f"<td>{date_str}</td>"
-            f"<td>{r['away_team']}</td>"
-            f"<td>{r['home_team']}</td>"
-            f"<td>{fmt_prob(r['home_win_prob'])}</td>"
-            f"<td>{fmt_line(r['line'])}</td>"
-            f"<td>{fmt_total(r['total'])}</td>"
-            f"</tr>"
-        )
-    return f"<table><thead>{head}</thead><tbody>\n" + "\n".join(rows) + "\n</tbody></table>"
+    # pandas renders the table; cells are pre-formatted column-wise, "—" for anything missing
+    line = pd.to_numeric(df["line"], errors="coerce")
+    total = pd.to_numeric(df["total"], errors="coerce")
+    prob = pd.to_numeric(df["home_win_prob"], errors="coerce")
+    disp = pd.DataFrame({
+        "Date": df["date"].dt.strftime("%Y-%m-%d"),
+        "Away": df["away_team"],
+        "Home": df["home_team"],
+        "P(Home)": (prob*100).map("{:0.1f}%".format).where(prob.notna()),
+        "Line": line.map("{:+0.1f}".format).where(line.notna()),
+        "Total": total.map("{:0.1f}".format).where(total.notna()),
+    })
+    return disp.to_html(index=False, classes="report", na_rep="—", border=0, escape=True)
 
 def date_range_label(df):
     ds = df["date"].dropna()
@@ -156,23 +228,7 @@ def build_html(df, src_path):
 <meta charset="utf-8" />
 <title>NFL Weekly Report</title>
 <style>
- body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; padding: 24px; background:#fff; color:#222; }}
- h1 {{ margin: 0 0 8px 0; font-size: 28px; }}
- .meta {{ color:#555; margin-bottom: 18px; font-size: 13px; }}
- table {{ border-collapse: collapse; width: 100%; font-size: 14px; }}
- th, td {{ padding: 10px 8px; text-align: left; border-bottom: 1px solid #eee; }}
- th {{ background: #fafafa; position: sticky; top: 0; z-index: 1; }}
- tr.even {{ background: #fff; }}
- tr.odd  {{ background: #fcfcfc; }}
- .grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(260px, 1fr)); gap: 14px; margin-top: 18px; }}
- .card {{ border: 1px solid #eee; border-radius: 12px; padding: 10px; background: #fff; box-shadow: 0 1px 2px rgba(0,0,0,0.03); }}
- .card img {{ width: 100%; height: auto; display:block; border-radius: 8px; }}
- .card.fallback .title {{ font-weight: 600; margin-bottom: 6px; }}
- .card.fallback .meta  {{ color:#666; font-size: 12px; margin-bottom: 8px; }}
- .card.fallback .row   {{ display:flex; justify-content: space-between; font-size: 13px; padding: 4px 0; border-top: 1px dashed #eee; }}
- .footer {{ color:#666; font-size: 12px; margin-top: 24px; }}
- .small  {{ color:#666; font-size: 12px; }}
-</style>
+{REPORT_CSS}</style>
 </head>
 <body>
   <h1>NFL Weekly Report</h1>
@@ -7,6 +7,12 @@ Usage:
 # Train on last complete season backtest
 python3 scripts/calibrate_blend.py --train_csv out/backtest_details.csv
 
+# Train without the reliability plot (skips importing matplotlib)
+python3 scripts/calibrate_blend.py --train_csv out/backtest_details.csv --no_plot
+
+# matplotlib caches font metadata under MPLCONFIGDIR; point it at a persistent
+# directory (e.g. MPLCONFIGDIR=/tmp/mplcache) so plotting runs skip the rebuild
+
 # Apply to current predictions
 python3 scripts/calibrate_blend.py \
   --apply_csv out/blended_predictions.csv \
@@ -17,7 +23,6 @@ python3 scripts/calibrate_blend.py \
 import argparse, os, json, joblib
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from sklearn.isotonic import IsotonicRegression
 from sklearn.metrics import log_loss, brier_score_loss
 
@@ -25,14 +30,21 @@ OUT_DIR = "out"
 ART_DIR = "artifacts"
 
 def reliability_curve(y_true, y_prob, bins=10):
-    df = pd.DataFrame({"y": y_true, "p": y_prob})
-    df["bin"] = pd.cut(df["p"], bins=np.linspace(0,1,bins+1), include_lowest=True)
-    out = df.groupby("bin").agg(
-        avg_prob=("p","mean"),
-        emp_rate=("y","mean"),
-        n=("y","size")
-    ).dropna()
-    return out.reset_index(drop=True)
+    # Same right-closed bins as pd.cut(include_lowest=True); counts and sums via np.bincount
+    y_true = np.asarray(y_true, dtype=float)
+    y_prob = np.asarray(y_prob, dtype=float)
+    edges = np.linspace(0, 1, bins+1)
+    ok = (y_prob >= 0) & (y_prob <= 1)
+    idx = np.maximum(np.searchsorted(edges, y_prob[ok], side="left") - 1, 0)
+    n = np.bincount(idx, minlength=bins)
+    sum_p = np.bincount(idx, weights=y_prob[ok], minlength=bins)
+    sum_y = np.bincount(idx, weights=y_true[ok], minlength=bins)
+    hit = n > 0
+    return pd.DataFrame({
+        "avg_prob": sum_p[hit] / n[hit],
+        "emp_rate": sum_y[hit] / n[hit],
+        "n": n[hit],
+    })
 
 def train(train_csv, model_out, report_out, plot_out):
     df = pd.read_csv(train_csv)
@@ -54,10 +66,6 @@ def train(train_csv, model_out, report_out, plot_out):
     cal_ll = log_loss(y_true, y_cal)
     cal_br = brier_score_loss(y_true, y_cal)
 
-    # reliability curves
-    pre = reliability_curve(y_true, y_prob, bins=10)
-    post = reliability_curve(y_true, y_cal, bins=10)
-
     os.makedirs(OUT_DIR, exist_ok=True)
     os.makedirs(ART_DIR, exist_ok=True)
 
@@ -70,19 +78,28 @@ def train(train_csv, model_out, report_out, plot_out):
             "calibrated": {"logloss": cal_ll, "brier": cal_br}
         }, f, indent=2)
 
-    # plot
-    plt.figure(figsize=(6,6))
-    plt.plot(pre["avg_prob"], pre["emp_rate"], "o-", label="Pre-blend")
-    plt.plot(post["avg_prob"], post["emp_rate"], "o-", label="Post-calibrated")
-    plt.plot([0,1],[0,1],"k--")
-    plt.xlabel("Predicted prob")
-    plt.ylabel("Empirical win rate")
-    plt.title("Isotonic calibration (pre vs post)")
-    plt.legend()
-    plt.savefig(plot_out, bbox_inches="tight")
-    plt.close()
-
-    print(f"[done] Trained isotonic → {model_out}, report {report_out}, plot {plot_out}")
+    # reliability plot (matplotlib is only imported when a plot is wanted)
+    if plot_out:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        pre = reliability_curve(y_true, y_prob, bins=10)
+        post = reliability_curve(y_true, y_cal, bins=10)
+
+        plt.figure(figsize=(6,6))
+        plt.plot(pre["avg_prob"], pre["emp_rate"], "o-", label="Pre-blend")
+        plt.plot(post["avg_prob"], post["emp_rate"], "o-", label="Post-calibrated")
+        plt.plot([0,1],[0,1],"k--")
+        plt.xlabel("Predicted prob")
+        plt.ylabel("Empirical win rate")
+        plt.title("Isotonic calibration (pre vs post)")
+        plt.legend()
+        plt.savefig(plot_out, bbox_inches="tight")
+        plt.close()
+
+    plot_note = f", plot {plot_out}" if plot_out else ""
+    print(f"[done] Trained isotonic → {model_out}, report {report_out}{plot_note}")
 
 def apply(apply_csv, model_in, out_csv):
     df = pd.read_csv(apply_csv)
@@ -102,10 +119,11 @@ def main():
     ap.add_argument("--out", default=os.path.join(OUT_DIR,"blended_predictions_cal.csv"))
     ap.add_argument("--report", default=os.path.join(OUT_DIR,"calib_report.json"))
     ap.add_argument("--plot", default=os.path.join(ART_DIR,"calibration_pre_post.png"))
+    ap.add_argument("--no_plot", action="store_true", help="skip the reliability plot (and the matplotlib import)")
     args = ap.parse_args()
 
     if args.train_csv:
-        train(args.train_csv, args.model, args.report, args.plot)
+        train(args.train_csv, args.model, args.report, None if args.no_plot else args.plot)
     elif args.apply_csv:
         apply(args.apply_csv, args.model, args.out)
     else:
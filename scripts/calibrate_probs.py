@@ -35,14 +35,18 @@ def _ensure_exists(p: pathlib.Path, label: str):
     if not p.exists():
         sys.exit(f"[FATAL] Missing {label}: {p}")
 
-def _cv_scores_platt(x, y, n_splits=5, random_state=42):
+def _platt():
+    # one feature: lbfgs converges in a handful of iterations; 200 is ample headroom
+    return LogisticRegression(solver="lbfgs", max_iter=200)
+
+def _cv_scores_platt(LX, y, n_splits=5, random_state=42):
+    """LX: the (n, 1) logit feature matrix, shared with the final Platt fit."""
     kf = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
-    preds = np.zeros_like(y, dtype=float)
-    lx = _safe_logit(x)
-    for tr, te in kf.split(x):
-        lr = LogisticRegression(solver="lbfgs", max_iter=1000)
-        lr.fit(lx[tr].reshape(-1, 1), y[tr])
-        preds[te] = lr.predict_proba(lx[te].reshape(-1, 1))[:, 1]
+    preds = np.empty(y.shape[0])  # every index is written by exactly one fold
+    for tr, te in kf.split(LX):
+        lr = _platt()
+        lr.fit(LX[tr], y[tr])
+        preds[te] = lr.predict_proba(LX[te])[:, 1]
     preds = np.clip(preds, *CLIP)
     return {
         "brier": float(brier_score_loss(y, preds)),
@@ -51,8 +55,15 @@ def _cv_scores_platt(x, y, n_splits=5, random_state=42):
 
 def _cv_scores_iso(x, y, n_splits=5, random_state=42):
     kf = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
-    preds = np.zeros_like(y, dtype=float)
-    for tr, te in kf.split(x):
+    preds = np.empty(y.shape[0])
+    # sort by (x, y) once, the order IsotonicRegression.fit sorts into; each fold's training
+    # rows are then taken already sorted, so the fit's own sort runs over presorted input
+    order = np.lexsort((y, x))
+    in_tr = np.empty(y.shape[0], dtype=bool)
+    for _, te in kf.split(x):
+        in_tr.fill(True)
+        in_tr[te] = False
+        tr = order[in_tr[order]]
         iso = IsotonicRegression(out_of_bounds="clip")
         iso.fit(x[tr], y[tr])
         preds[te] = iso.predict(x[te])
@@ -86,16 +97,18 @@ def main():
     # sanity clip
     x = np.clip(x, *CLIP)
 
+    LX = _safe_logit(x).reshape(-1, 1)
+
     # cross-validated metrics
-    platt_cv, platt_preds = _cv_scores_platt(x, y)
+    platt_cv, platt_preds = _cv_scores_platt(LX, y)
     iso_cv, iso_preds     = _cv_scores_iso(x, y)
 
     print("[CV] Platt   :", json.dumps(platt_cv))
     print("[CV] Isotonic:", json.dumps(iso_cv))
 
     # fit final calibrators on all history
-    lr = LogisticRegression(solver="lbfgs", max_iter=1000)
-    lr.fit(_safe_logit(x).reshape(-1,1), y)
+    lr = _platt()
+    lr.fit(LX, y)
     iso = IsotonicRegression(out_of_bounds="clip")
     iso.fit(x, y)
 
@@ -18,8 +18,10 @@ def main()->int:
         print("[FATAL] Missing out/results/finals.csv", file=sys.stderr)
         return 2
 
-    b = pd.read_csv(BOARD, dtype=str)
-    f = pd.read_csv(FINALS, dtype=str)
+    # only game_id is parsed; a callable usecols leaves it absent (not an error) when missing
+    only_id = lambda c: c == "game_id"
+    b = pd.read_csv(BOARD, usecols=only_id, dtype=str)
+    f = pd.read_csv(FINALS, usecols=only_id, dtype=str)
 
     if "game_id" not in b.columns:
         write_html([], [], "Board missing game_id")
@@ -30,12 +32,13 @@ def main()->int:
         print("[FATAL] Finals missing game_id", file=sys.stderr)
         return 2
 
-    b_ids = set(b["game_id"].dropna().astype(str))
-    f_ids = set(f["game_id"].dropna().astype(str))
+    # distinct ids as hash-backed Indexes; lists only for the report
+    b_ids = pd.Index(b["game_id"]).dropna().astype(str).unique()
+    f_ids = pd.Index(f["game_id"]).dropna().astype(str).unique()
 
-    miss_in_board = sorted(f_ids - b_ids)
-    miss_in_finals = sorted(b_ids - f_ids)
-    matched = sorted(b_ids & f_ids)
+    miss_in_board = f_ids.difference(b_ids, sort=False).sort_values().tolist()
+    miss_in_finals = b_ids.difference(f_ids, sort=False).sort_values().tolist()
+    matched = b_ids.intersection(f_ids, sort=False)
 
     write_html(miss_in_board, miss_in_finals, None, matched_count=len(matched), board_count=len(b_ids), finals_count=len(f_ids))
 
@@ -36,7 +36,7 @@ import argparse
 import os
 import re
 import sys
-from typing import Dict, Tuple, List
+from typing import Dict, List
 
 import pandas as pd
 
@@ -125,20 +125,40 @@ def parse_season_year_from_msf(msf_week_path: str) -> int:
         return int(str(df["startTime_utc"].iloc[0])[:4])
     raise ValueError("Could not infer season year from out/msf_week.csv")
 
-def strip_playcaller(text: str) -> Tuple[str, bool]:
-    """Return (clean_name, is_playcaller)."""
-    if not isinstance(text, str):
-        return "", False
-    t = text.strip()
-    is_pc = "(play-caller)" in t.lower() or "(play caller)" in t.lower() or "(playcaller)" in t.lower()
-    # remove the parenthetical note
-    clean = re.sub(r"\s*\(.*?play[-\s]?caller.*?\)\s*", "", t, flags=re.IGNORECASE).strip()
-    return clean, is_pc
+# "(play-caller)" / "(play caller)" / "(playcaller)" marks the OC who calls plays
+PLAYCALLER_FLAG_RE = re.compile(r"\((?:play-caller|play caller|playcaller)\)", re.IGNORECASE)
+# any parenthetical mentioning play-calling is dropped from the name
+PLAYCALLER_NOTE_RE = re.compile(r"\s*\(.*?play[-\s]?caller.*?\)\s*", re.IGNORECASE)
+
+COACH_CACHE_DIR = os.path.join("out", "_coach_cache")
+# bump whenever parse_coach_table's output can change (parsing, PLAYCALLER_*_RE, TEAM_NAME_TO_ABBR)
+COACH_PARSER_VERSION = 1
 
 def load_coach_table(year: int) -> pd.DataFrame:
+    """
+    Parsed coaching table for `year`. The parsed frame is cached as Parquet under
+    out/_coach_cache/ (one file per parser version) and reused while it is at least
+    as new as the CSV.
+    """
     path = os.path.join("Data", "Coaches", f"{year}.csv")
     if not os.path.exists(path):
         raise FileNotFoundError(f"Missing coaching file: {path}")
+    cache = os.path.join(COACH_CACHE_DIR, f"coaches_{year}_v{COACH_PARSER_VERSION}.parquet")
+    if os.path.exists(cache) and os.stat(cache).st_mtime_ns >= os.stat(path).st_mtime_ns:
+        try:
+            return pd.read_parquet(cache)
+        except Exception:
+            pass  # unreadable cache -> parse the CSV
+    df = parse_coach_table(path, year)
+    try:
+        os.makedirs(COACH_CACHE_DIR, exist_ok=True)
+        df.to_parquet(cache, index=False)
+    except Exception:
+        if os.path.exists(cache):
+            os.remove(cache)
+    return df
+
+def parse_coach_table(path: str, year: int) -> pd.DataFrame:
     df = pd.read_csv(path).fillna("")
     # Expected columns: Team,Head Coach,Offensive Coordinator,Defensive Coordinator
     for col in ["Team", "Head Coach", "Offensive Coordinator", "Defensive Coordinator"]:
@@ -151,64 +171,64 @@ def load_coach_table(year: int) -> pd.DataFrame:
         raise ValueError(f"{path}: could not map these team names to abbreviations: {missing}")
 
     df["hc_name"] = df["Head Coach"].astype(str).str.strip()
-    df["oc_name_raw"] = df["Offensive Coordinator"].astype(str)
+    oc_raw = df["Offensive Coordinator"].astype(str).str.strip()
     df["dc_name"] = df["Defensive Coordinator"].astype(str).str.strip()
 
-    oc_pairs = df["oc_name_raw"].apply(strip_playcaller)
-    df["oc_name"] = [p[0] for p in oc_pairs]
-    df["oc_playcaller_flag"] = [p[1] for p in oc_pairs]
-    df = df.drop(columns=["oc_name_raw"])
+    # one compiled regex pass over the whole OC column for the flag and the clean name
+    df["oc_name"] = oc_raw.str.replace(PLAYCALLER_NOTE_RE, "", regex=True).str.strip()
+    df["oc_playcaller_flag"] = oc_raw.str.contains(PLAYCALLER_FLAG_RE).astype(bool)
     df["season_year"] = year
     return df[["season_year","team_abbr","hc_name","oc_name","dc_name","oc_playcaller_flag"]]
 
-def compute_tenure(coach_stack: Dict[int, pd.DataFrame], team: str, role: str, year: int) -> int:
+ROLES = ("hc_name", "oc_name", "dc_name")
+
+def coach_timelines(coach_stack: Dict[int, pd.DataFrame]) -> Dict[str, Dict[str, Dict[int, str]]]:
+    """
+    Per role, {team: {season_year: name}} over every loaded season, built once.
+    The first row per (season, team) wins, as the per-year table lookups took it;
+    a team absent from a season simply has no entry for that year.
+    """
+    all_coaches = pd.concat(coach_stack.values(), ignore_index=True) \
+        .drop_duplicates(["season_year", "team_abbr"], keep="first")
+    return {
+        role: {team: dict(zip(g["season_year"], g[role])) for team, g in all_coaches.groupby("team_abbr")}
+        for role in ROLES
+    }
+
+def compute_tenure(timelines: Dict[str, Dict[str, Dict[int, str]]], team: str, role: str, year: int) -> int:
     """
     Count consecutive seasons (including `year`) with same 'role' coach name for `team`,
     scanning backward until change.
     """
-    assert role in {"hc_name","oc_name","dc_name"}
-    this_df = coach_stack.get(year)
-    if this_df is None:
-        return 0
-    try:
-        current = this_df.loc[this_df["team_abbr"] == team, role].iloc[0]
-    except IndexError:
-        return 0
+    assert role in ROLES
+    names = timelines[role].get(team, {})
+    current = names.get(year)
     if not current:
         return 0
+    current = str(current).strip()
 
     tenure = 0
     yr = year
-    while True:
-        df_y = coach_stack.get(yr)
-        if df_y is None:
-            break
-        sub = df_y[df_y["team_abbr"] == team]
-        if sub.empty:
-            break
-        name_y = sub[role].iloc[0]
-        if not name_y or str(name_y).strip() != str(current).strip():
-            break
+    # a missing season (no table, or team absent from it) ends the run like a change does
+    while names.get(yr) and str(names[yr]).strip() == current:
         tenure += 1
         yr -= 1
     return tenure
 
-def continuity_index(coach_stack: Dict[int, pd.DataFrame], team: str, year: int) -> float:
-    """Fraction of (HC,OC,DC) unchanged vs prior season."""
-    cur = coach_stack.get(year)
-    prv = coach_stack.get(year - 1)
+def continuity_by_team(coach_stack: Dict[int, pd.DataFrame], year: int) -> pd.Series:
+    """
+    Fraction of (HC,OC,DC) unchanged vs prior season, for every team present in both
+    seasons (index: team_abbr). Teams missing either season are absent; callers use 0.0.
+    """
+    cur, prv = coach_stack.get(year), coach_stack.get(year - 1)
     if cur is None or prv is None:
-        return 0.0
-    try:
-        c = cur[cur["team_abbr"] == team].iloc[0]
-        p = prv[prv["team_abbr"] == team].iloc[0]
-    except IndexError:
-        return 0.0
-    same = 0
-    for role in ["hc_name","oc_name","dc_name"]:
-        if str(c[role]).strip() and str(c[role]).strip() == str(p[role]).strip():
-            same += 1
-    return round(same / 3.0, 3)
+        return pd.Series(dtype=float)
+    cur = cur.drop_duplicates("team_abbr").set_index("team_abbr")[list(ROLES)]
+    prv = prv.drop_duplicates("team_abbr").set_index("team_abbr")[list(ROLES)]
+    cur, prv = cur.align(prv, join="inner")
+    # names are stored stripped; an empty name never counts as unchanged
+    same = ((cur == prv) & (cur != "")).sum(axis=1)
+    return (same / 3.0).round(3)
 
 
 # ---------- Main ----------
@@ -245,6 +265,8 @@ def main():
     if cur is None:
         sys.exit(f"[coach][FAIL] No coaching table for {season_year} in Data/Coaches/{season_year}.csv")
 
+    timelines = coach_timelines(coach_stack)
+    continuity = continuity_by_team(coach_stack, season_year)
     for t in sorted(set(teams)):
         sub = cur[cur["team_abbr"] == t]
         if sub.empty:
@@ -264,10 +286,10 @@ def main():
         dc = str(rec["dc_name"]).strip()
         oc_pc = bool(rec["oc_playcaller_flag"])
 
-        hc_ten = compute_tenure(coach_stack, t, "hc_name", season_year)
-        oc_ten = compute_tenure(coach_stack, t, "oc_name", season_year)
-        dc_ten = compute_tenure(coach_stack, t, "dc_name", season_year)
-        cont = continuity_index(coach_stack, t, season_year)
+        hc_ten = compute_tenure(timelines, t, "hc_name", season_year)
+        oc_ten = compute_tenure(timelines, t, "oc_name", season_year)
+        dc_ten = compute_tenure(timelines, t, "dc_name", season_year)
+        cont = float(continuity.get(t, 0.0))
 
         rows.append({
             "season_year": season_year,
@@ -16,7 +16,7 @@ Outputs:
   out/elo_season_start.csv    season,team,elo_start
   out/elo_games_enriched.csv  per-game with pre Elo & expected prob (exp_home)
 """
-import argparse, glob, os
+import argparse, glob, math, os
 import pandas as pd
 import numpy as np
 
@@ -28,13 +28,18 @@ def nfl_season_year(dser):
     m = dt.dt.month; y = dt.dt.year
     return (y.where(m >= 8, y - 1)).astype("Int64")
 
+HIST_COLS = ["home_team","away_team","date","home_score","away_score"]
+
+def read_hist_csv(path):
+    """Just the HIST_COLS of one history file; the other columns are never parsed."""
+    return pd.read_csv(path, usecols=lambda c: c in HIST_COLS)
+
 def read_hist(glob_pat):
     frames = []
     for p in sorted(glob.glob(glob_pat)):
         try:
-            df = pd.read_csv(p)
-            need = ["home_team","away_team","date","home_score","away_score"]
-            if not all(c in df.columns for c in need): continue
+            df = read_hist_csv(p)
+            if not all(c in df.columns for c in HIST_COLS): continue
             df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.tz_localize(None)
             df = df.dropna(subset=["date"])
             df["season"] = nfl_season_year(df["date"])
@@ -49,63 +54,95 @@ def read_hist(glob_pat):
     out = pd.concat(frames, ignore_index=True).sort_values("date").reset_index(drop=True)
     return out
 
+# 10**(x/400) == exp(x * ln(10)/400): one libm exp instead of a float power
+_ELO_SCALE = math.log(10.0) / 400.0
+
 def expected_prob(elo_diff):
-    return 1.0 / (1.0 + 10.0 ** (-(elo_diff) / 400.0))
+    return 1.0 / (1.0 + math.exp(-elo_diff * _ELO_SCALE))
 
 def mov_multiplier(margin, elo_diff):
-    return np.log(max(margin,1)+1.0) * (2.2 / ( (abs(elo_diff)*0.001) + 2.2 ))
+    return math.log(max(margin,1)+1.0) * (2.2 / ( (abs(elo_diff)*0.001) + 2.2 ))
+
+def _elo_season_kernel(h_idx, a_idx, hs, as_, ratings, k, hfa_elo,
+                       elo_h_pre, elo_a_pre, diff, exp_home, delta):
+    """
+    One season's games in date order: updates `ratings` (indexed by team code) in place
+    and fills the per-game output arrays. Sequential by nature — each game reads the
+    ratings the previous one wrote — so it stays a scalar loop over plain arrays.
+    """
+    for i in range(h_idx.shape[0]):
+        h, a = h_idx[i], a_idx[i]
+        elo_h = ratings[h]
+        elo_a = ratings[a]
+
+        d = (elo_h + hfa_elo) - elo_a
+        eh = expected_prob(d)
+        rh = 1.0 if hs[i] > as_[i] else (0.5 if hs[i] == as_[i] else 0.0)
+        g = mov_multiplier(abs(hs[i] - as_[i]), d)
+        dl = k * g * (rh - eh)
+
+        ratings[h] = elo_h + dl; ratings[a] = elo_a - dl
+        elo_h_pre[i] = elo_h; elo_a_pre[i] = elo_a
+        diff[i] = d; exp_home[i] = eh; delta[i] = dl
 
 def compute_elo(hist, k=20.0, hfa_elo=55.0, season_regress=0.25):
-    ratings = {}
-    season_start = []
-    games_rows = []
-    rating_snapshots = []
-
-    for season in sorted([s for s in hist["season"].dropna().unique() if s > 0]):
-        season_df = hist[hist["season"] == season].sort_values("date").copy()
-
-        # season regression
-        teams = pd.unique(pd.concat([season_df["home_team"], season_df["away_team"]], ignore_index=True))
-        for t in teams:
-            prev = ratings.get(t, BASE_ELO)
-            ratings[t] = (1 - season_regress) * prev + season_regress * BASE_ELO
-            season_start.append({"season": int(season), "team": t, "elo_start": ratings[t]})
-
-        # iterate games
-        for _, row in season_df.iterrows():
-            h, a = row["home_team"], row["away_team"]
-            hs, as_ = float(row["home_score"]), float(row["away_score"])
-            date = row["date"]
-
-            elo_h = ratings.get(h, BASE_ELO)
-            elo_a = ratings.get(a, BASE_ELO)
-
-            diff = (elo_h + hfa_elo) - elo_a
-            eh = expected_prob(diff)
-            rh = 1.0 if hs > as_ else (0.5 if hs == as_ else 0.0)
-            margin = abs(hs - as_)
-            g = mov_multiplier(margin, diff)
-            delta = k * g * (rh - eh)
-
-            elo_h_post = elo_h + delta
-            elo_a_post = elo_a - delta
-            ratings[h] = elo_h_post; ratings[a] = elo_a_post
-
-            games_rows.append({
-                "date": date.date(), "season": int(season),
-                "home_team": h, "away_team": a,
-                "elo_home_pre": elo_h, "elo_away_pre": elo_a,
-                "elo_diff_pre": diff, "exp_home": eh,
-                "home_score": hs, "away_score": as_, "mov": margin, "delta": delta
-            })
-            rating_snapshots.append({"date": date.date(), "team": h, "elo_post": elo_h_post})
-            rating_snapshots.append({"date": date.date(), "team": a, "elo_post": elo_a_post})
+    # teams are encoded once; ratings live in one array indexed by team code
+    n = len(hist)
+    codes, teams_all = pd.factorize(pd.concat([hist["home_team"], hist["away_team"]], ignore_index=True),
+                                    use_na_sentinel=False)
+    hist = hist.assign(_h=codes[:n], _a=codes[n:])
+    ratings = np.full(len(teams_all), BASE_ELO)  # unseen teams start at BASE_ELO
+    season_start = []  # per-season frames
+    games_frames = []
+    snapshot_frames = []
+
+    # one pass splits the seasons (groups keep row order, so the per-season date sort is unchanged)
+    for season, season_df in hist.groupby("season", sort=True):
+        if not season > 0:
+            continue
+        season_df = season_df.sort_values("date")
+
+        # season regression: every team seen this season, in order of first appearance
+        teams = pd.unique(np.concatenate([season_df["_h"].to_numpy(), season_df["_a"].to_numpy()]))
+        ratings[teams] = (1 - season_regress) * ratings[teams] + season_regress * BASE_ELO
+        season_start.append(pd.DataFrame({"season": int(season), "team": teams_all.take(teams),
+                                          "elo_start": ratings[teams]}))
+
+        # iterate games over plain column arrays
+        h_idx = season_df["_h"].to_numpy()
+        a_idx = season_df["_a"].to_numpy()
+        hs = season_df["home_score"].to_numpy(dtype=np.float64)
+        as_ = season_df["away_score"].to_numpy(dtype=np.float64)
+        m = len(season_df)
+        elo_h_pre = np.empty(m); elo_a_pre = np.empty(m)
+        diff = np.empty(m); exp_home = np.empty(m); delta = np.empty(m)
+        _elo_season_kernel(h_idx, a_idx, hs, as_, ratings, float(k), float(hfa_elo),
+                           elo_h_pre, elo_a_pre, diff, exp_home, delta)
+
+        dates = season_df["date"].dt.date.to_numpy()
+        home, away = season_df["home_team"].to_numpy(), season_df["away_team"].to_numpy()
+        games_frames.append(pd.DataFrame({
+            "date": dates, "season": int(season),
+            "home_team": home, "away_team": away,
+            "elo_home_pre": elo_h_pre, "elo_away_pre": elo_a_pre,
+            "elo_diff_pre": diff, "exp_home": exp_home,
+            "home_score": hs, "away_score": as_, "mov": np.abs(hs - as_), "delta": delta
+        }))
+        # one snapshot per side, home before away, as the games were played
+        snapshot_frames.append(pd.DataFrame({
+            "date": np.repeat(dates, 2),
+            "team": np.column_stack([home, away]).ravel(),
+            "elo_post": np.column_stack([elo_h_pre + delta, elo_a_pre - delta]).ravel(),
+        }))
+
+    games = pd.concat(games_frames, ignore_index=True)
+    rating_snapshots = pd.concat(snapshot_frames, ignore_index=True)
 
     os.makedirs(OUT_DIR, exist_ok=True)
-    pd.DataFrame(rating_snapshots).drop_duplicates(["date","team"], keep="last") \
+    rating_snapshots.drop_duplicates(["date","team"], keep="last") \
         .to_csv(os.path.join(OUT_DIR, "elo_ratings.csv"), index=False)
-    pd.DataFrame(games_rows).to_csv(os.path.join(OUT_DIR, "elo_games_enriched.csv"), index=False)
-    pd.DataFrame(season_start).drop_duplicates(["season","team"], keep="last") \
+    games.to_csv(os.path.join(OUT_DIR, "elo_games_enriched.csv"), index=False)
+    pd.concat(season_start, ignore_index=True).drop_duplicates(["season","team"], keep="last") \
         .to_csv(os.path.join(OUT_DIR, "elo_season_start.csv"), index=False)
     print("Wrote out/elo_ratings.csv, out/elo_games_enriched.csv, out/elo_season_start.csv")
 
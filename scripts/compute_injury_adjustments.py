@@ -30,15 +30,15 @@ def load_inj() -> pd.DataFrame:
     return df
 
 # ---- weights (can be tuned later) ----
-def _pos_family(p):
-    p = str(p or "").upper()
-    if p in ("QB",): return "QB"
-    if p in ("LT","RT","LG","RG","C","OL","T","G"): return "OL"
-    if p in ("WR","TE","FB","RB","HB"): return "SKILL"
-    if p in ("EDGE","DE","DT","DL","LB"): return "FRONT7"
-    if p in ("CB","S","FS","SS","DB"): return "COVER"
-    if p in ("K","P","LS"): return "ST"
-    return "OTHER"
+# position -> family; anything unlisted is "OTHER"
+POS_FAMILY = {
+    **dict.fromkeys(("QB",), "QB"),
+    **dict.fromkeys(("LT","RT","LG","RG","C","OL","T","G"), "OL"),
+    **dict.fromkeys(("WR","TE","FB","RB","HB"), "SKILL"),
+    **dict.fromkeys(("EDGE","DE","DT","DL","LB"), "FRONT7"),
+    **dict.fromkeys(("CB","S","FS","SS","DB"), "COVER"),
+    **dict.fromkeys(("K","P","LS"), "ST"),
+}
 
 STATUS_W = {
     "OUT": 1.00,
@@ -61,25 +61,21 @@ POS_W = {
 def compute_deltas(week: pd.DataFrame, inj: pd.DataFrame) -> pd.DataFrame:
     team_imp = inj.copy()
     # derive player-level impact
-    fam = team_imp["position"].map(_pos_family)
+    fam = team_imp["position"].astype(str).str.upper().map(POS_FAMILY).fillna("OTHER")
     sw  = team_imp["status_norm"].astype(str).str.upper().map(STATUS_W).fillna(0.0)
     pw  = fam.map(POS_W).fillna(0.0)
     team_imp["impact"] = (sw * pw).astype(float)
 
-    # aggregate to team totals (positive number = total penalty to team strength)
-    team_tot = team_imp.groupby("team_abbr", as_index=False)["impact"].sum()
-
-    # join to week and convert to Elo deltas (negative = team dinged)
-    out = week.merge(
-        team_tot.rename(columns={"team_abbr":"home_abbr","impact":"elo_delta_home"}),
-        on="home_abbr", how="left"
-    ).merge(
-        team_tot.rename(columns={"team_abbr":"away_abbr","impact":"elo_delta_away"}),
-        on="away_abbr", how="left"
-    )
+    # aggregate to team totals (positive number = total penalty to team strength);
+    # teams as a categorical keep the groupby on integer codes
+    teams = team_imp["team_abbr"].astype("category")
+    team_tot = team_imp["impact"].groupby(teams, observed=True).sum()
+    team_tot.index = team_tot.index.astype(object)
 
-    out["elo_delta_home"] = -out["elo_delta_home"].fillna(0.0)
-    out["elo_delta_away"] = -out["elo_delta_away"].fillna(0.0)
+    # look up each side's total and convert to Elo deltas (negative = team dinged)
+    out = week.copy()
+    out["elo_delta_home"] = -out["home_abbr"].map(team_tot).fillna(0.0)
+    out["elo_delta_away"] = -out["away_abbr"].map(team_tot).fillna(0.0)
 
     # canonical slug
     out["slug"] = (
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 import os, pandas as pd, numpy as np
 
+from _table_io import read_table
+
 # choose source: calibrated blend if present & valid; else raw blend
 src = "out/blended_predictions.csv"
 bsrc_txt = "out/BLEND_SOURCE.txt"
@@ -9,7 +11,7 @@ if os.path.exists(bsrc_txt):
     if cand and os.path.exists(cand):
         src = cand
 
-df = pd.read_csv(src, usecols=["home_team","away_team","date","home_win_prob"]).copy()
+df = read_table(src, columns=["home_team","away_team","date","home_win_prob"]).copy()
 df["date"] = pd.to_datetime(df["date"], errors="coerce")
 df = df.dropna(subset=["date","home_win_prob"])
 